@@ -147,6 +147,9 @@ class NotificationSettingsAdmin(admin.ModelAdmin):
             'fields': ('notify_uploaded_reminder', 'notify_sent_reminder', 'notify_invoice_received')
         }),
     )
+    
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('user')
 
 
 @admin.register(Notification)
@@ -257,3 +260,7 @@ class ShipmentAdmin(admin.ModelAdmin):
                 return format_html('<span style="color: green;">✓ Совпадает</span>')
         return "-"
     cbm_difference_display.short_description = 'Разница'
+    
+    def get_queryset(self, request):
+        # Заказы фуры для orders_count загружаются одним запросом на страницу
+        return super().get_queryset(request).prefetch_related('orders')
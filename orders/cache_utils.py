@@ -4,7 +4,7 @@
 from django.core.cache import cache
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Order, Factory, Country, Notification
+from .models import Order, Factory, Country, Notification, NotificationSettings, NotificationTemplate
 
 
 def clear_user_cache(user_id):
@@ -39,6 +39,77 @@ def clear_factories_cache():
             cache.delete(key)
 
 
+# Публичная статистика хранится под версионированным ключом:
+# обновление увеличивает версию, старые записи истекают сами по таймауту
+PUBLIC_STATISTICS_VERSION_KEY = 'public_statistics:ver'
+
+
+def get_public_statistics_cache_key():
+    """Текущий ключ кэша публичной статистики"""
+    version = cache.get(PUBLIC_STATISTICS_VERSION_KEY)
+    if version is None:
+        # Версия хранится без таймаута
+        cache.add(PUBLIC_STATISTICS_VERSION_KEY, 0, None)
+        version = cache.get(PUBLIC_STATISTICS_VERSION_KEY, 0)
+    return f'public_statistics:{version}'
+
+
+def bump_public_statistics_version():
+    """
+    Инвалидация публичной статистики.
+    
+    Returns:
+        str: Новый ключ кэша публичной статистики
+    """
+    cache.add(PUBLIC_STATISTICS_VERSION_KEY, 0, None)
+    try:
+        version = cache.incr(PUBLIC_STATISTICS_VERSION_KEY)
+    except ValueError:
+        # Ключ версии успел истечь или быть вытесненным между add и incr
+        cache.set(PUBLIC_STATISTICS_VERSION_KEY, 1, None)
+        version = 1
+    return f'public_statistics:{version}'
+
+
+# Активные шаблоны уведомлений меняются редко - кэшируем по типу
+NOTIFICATION_TEMPLATE_CACHE_KEY = 'notification_template_{}'
+NOTIFICATION_TEMPLATE_CACHE_TIMEOUT = 3600
+
+
+def get_notification_template(template_type):
+    """
+    Получение активного шаблона уведомления по типу (из кэша, при промахе - из БД).
+    
+    Raises:
+        NotificationTemplate.DoesNotExist: Если активного шаблона нет
+    """
+    cache_key = NOTIFICATION_TEMPLATE_CACHE_KEY.format(template_type)
+    template = cache.get(cache_key)
+    if template is None:
+        template = NotificationTemplate.objects.get(template_type=template_type, is_active=True)
+        cache.set(cache_key, template, NOTIFICATION_TEMPLATE_CACHE_TIMEOUT)
+    return template
+
+
+# Настройки уведомлений читаются при каждой отправке уведомления - кэшируем по пользователю
+NOTIFICATION_SETTINGS_CACHE_KEY = 'notification_settings_{}'
+NOTIFICATION_SETTINGS_CACHE_TIMEOUT = 3600
+
+
+def get_notification_settings(user):
+    """
+    Получение настроек уведомлений пользователя (из кэша, при промахе - из БД).
+    
+    Если настроек нет, они создаются со значениями по умолчанию.
+    """
+    cache_key = NOTIFICATION_SETTINGS_CACHE_KEY.format(user.pk)
+    settings_obj = cache.get(cache_key)
+    if settings_obj is None:
+        settings_obj, created = NotificationSettings.objects.get_or_create(user=user)
+        cache.set(cache_key, settings_obj, NOTIFICATION_SETTINGS_CACHE_TIMEOUT)
+    return settings_obj
+
+
 @receiver(post_save, sender=Order)
 def clear_order_cache(sender, instance, **kwargs):
     """Очистка кэша при изменении заказа"""
@@ -85,3 +156,32 @@ def clear_notification_cache(sender, instance, **kwargs):
 def clear_notification_delete_cache(sender, instance, **kwargs):
     """Очистка кэша при удалении уведомления"""
     clear_user_cache(instance.user.id)
+
+
+@receiver(post_save, sender=NotificationTemplate)
+def clear_notification_template_cache(sender, instance, **kwargs):
+    """Очистка кэша при изменении шаблона уведомления"""
+    # Тип шаблона мог быть изменен - старый ключ продолжал бы отдавать этот шаблон,
+    # поэтому сбрасываем ключи всех типов (их всего несколько)
+    cache.delete_many([
+        NOTIFICATION_TEMPLATE_CACHE_KEY.format(template_type)
+        for template_type, _ in NotificationTemplate.TEMPLATE_TYPES
+    ])
+
+
+@receiver(post_delete, sender=NotificationTemplate)
+def clear_notification_template_delete_cache(sender, instance, **kwargs):
+    """Очистка кэша при удалении шаблона уведомления"""
+    cache.delete(NOTIFICATION_TEMPLATE_CACHE_KEY.format(instance.template_type))
+
+
+@receiver(post_save, sender=NotificationSettings)
+def clear_notification_settings_cache(sender, instance, **kwargs):
+    """Очистка кэша при изменении настроек уведомлений"""
+    cache.delete(NOTIFICATION_SETTINGS_CACHE_KEY.format(instance.user_id))
+
+
+@receiver(post_delete, sender=NotificationSettings)
+def clear_notification_settings_delete_cache(sender, instance, **kwargs):
+    """Очистка кэша при удалении настроек уведомлений"""
+    cache.delete(NOTIFICATION_SETTINGS_CACHE_KEY.format(instance.user_id))
@@ -1,11 +1,19 @@
 from django.conf import settings
+from django.core.cache import cache
 from .models import Notification
 
+# Счетчик нужен на каждой странице - кэшируем; сбрасывается в cache_utils.clear_user_cache
+UNREAD_NOTIFICATIONS_CACHE_TIMEOUT = 300
+
 
 def notification_count(request):
     """Контекстный процессор для подсчета непрочитанных уведомлений"""
     if request.user.is_authenticated:
-        unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
+        cache_key = f'unread_notifications_{request.user.id}'
+        unread_count = cache.get(cache_key)
+        if unread_count is None:
+            unread_count = Notification.objects.filter(user=request.user, is_read=False).count()
+            cache.set(cache_key, unread_count, UNREAD_NOTIFICATIONS_CACHE_TIMEOUT)
         return {'unread_notifications_count': unread_count}
     return {'unread_notifications_count': 0}
 
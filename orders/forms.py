@@ -6,6 +6,22 @@ from .models import UserProfile, Order, Factory, NotificationSettings, Notificat
 from .constants import FileConstants
 
 
+# Варианты фильтров уведомлений (неизменяемые, общие для всех экземпляров формы)
+NOTIFICATION_TYPE_FILTER_CHOICES = (
+    ('', 'Все типы'),
+    ('order_uploaded', 'Заказ загружен'),
+    ('order_sent', 'Заказ отправлен'),
+    ('invoice_received', 'Инвойс получен'),
+    ('order_completed', 'Заказ завершен'),
+)
+
+NOTIFICATION_STATUS_FILTER_CHOICES = (
+    ('', 'Все'),
+    ('read', 'Прочитанные'),
+    ('unread', 'Непрочитанные'),
+)
+
+
 class CustomUserCreationForm(UserCreationForm):
     """
     Кастомная форма регистрации с полем email.
@@ -137,6 +153,8 @@ class OrderForm(forms.ModelForm):
     """
     
     # Переопределяем поле factory для добавления пустой опции
+    # Queryset задается один раз на уровне класса (фильтр активных фабрик
+    # совпадает с limit_choices_to у Order.factory), без пересборки в __init__
     # Оптимизация: используем select_related для избежания N+1 запросов
     # Улучшение UX: используем Select2 для удобного поиска и группировки по странам
     factory = forms.ModelChoiceField(
@@ -283,23 +301,13 @@ class NotificationFilterForm(forms.Form):
     )
     
     notification_type = forms.ChoiceField(
-        choices=[
-            ('', 'Все типы'),
-            ('order_uploaded', 'Заказ загружен'),
-            ('order_sent', 'Заказ отправлен'),
-            ('invoice_received', 'Инвойс получен'),
-            ('order_completed', 'Заказ завершен'),
-        ],
+        choices=NOTIFICATION_TYPE_FILTER_CHOICES,
         required=False,
         widget=forms.Select(attrs={'class': 'form-select'})
     )
     
     status = forms.ChoiceField(
-        choices=[
-            ('', 'Все'),
-            ('read', 'Прочитанные'),
-            ('unread', 'Непрочитанные'),
-        ],
+        choices=NOTIFICATION_STATUS_FILTER_CHOICES,
         required=False,
         widget=forms.Select(attrs={'class': 'form-select'})
     )
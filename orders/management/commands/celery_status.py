@@ -10,9 +10,10 @@ class Command(BaseCommand):
         self.stdout.write('=== Celery Beat Status ===\n')
         
         # Показываем все периодические задачи
-        tasks = PeriodicTask.objects.all()
+        # Загружаем задачи одним запросом, счетчики считаем в Python
+        tasks = list(PeriodicTask.objects.select_related('crontab', 'interval'))
         
-        if not tasks.exists():
+        if not tasks:
             self.stdout.write(self.style.WARNING('No periodic tasks found'))
             return
         
@@ -41,16 +42,20 @@ class Command(BaseCommand):
             self.stdout.write('')
         
         # Показываем статистику
-        enabled_count = tasks.filter(enabled=True).count()
-        total_count = tasks.count()
+        enabled_tasks = [task for task in tasks if task.enabled]
+        enabled_count = len(enabled_tasks)
+        total_count = len(tasks)
         
         self.stdout.write(f'Summary: {enabled_count}/{total_count} tasks enabled')
         
         # Показываем следующее выполнение
-        next_run_tasks = tasks.filter(enabled=True).exclude(last_run_at__isnull=True)
-        if next_run_tasks.exists():
+        next_run_tasks = [task for task in enabled_tasks if task.last_run_at]
+        if next_run_tasks:
             self.stdout.write('\nNext scheduled runs:')
+            now = timezone.now()
             for task in next_run_tasks[:5]:  # Показываем только первые 5
                 if task.crontab:
-                    next_run = task.crontab.schedule.next_run_at(timezone.now())
+                    # schedule - свойство, которое каждый раз заново строит crontab
+                    schedule = task.crontab.schedule
+                    next_run = now + schedule.remaining_estimate(task.last_run_at)
                     self.stdout.write(f'  {task.name}: {next_run}')
@@ -4,10 +4,31 @@ Management команда для проверки настроек email.
 
 from django.core.management.base import BaseCommand
 from django.conf import settings
-from django.core.mail import send_mail
 from django.template.loader import render_to_string
+from orders.tasks import send_test_email as send_test_email_task
+import logging
 import os
 
+logger = logging.getLogger('orders')
+
+# Сколько ждать результата отправки при --wait (секунды)
+TEST_EMAIL_WAIT_TIMEOUT = 30
+
+# Backend'ы, которые не отправляют письма по сети (разработка/тесты)
+NON_DELIVERING_BACKENDS = ('console', 'dummy', 'locmem')
+
+EMAIL_SETTING_NAMES = (
+    'EMAIL_BACKEND',
+    'EMAIL_HOST',
+    'EMAIL_PORT',
+    'EMAIL_USE_TLS',
+    'EMAIL_HOST_USER',
+    'EMAIL_HOST_PASSWORD',
+    'DEFAULT_FROM_EMAIL',
+    'EMAIL_CHARSET',
+    'BASE_URL',
+)
+
 
 class Command(BaseCommand):
     help = 'Проверяет текущие настройки email и отправляет тестовое письмо'
@@ -23,10 +44,20 @@ class Command(BaseCommand):
             action='store_true',
             help='Отправить тестовое письмо',
         )
+        parser.add_argument(
+            '--wait',
+            action='store_true',
+            help='Дождаться результата отправки тестового письма от Celery worker',
+        )
 
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('=== ПРОВЕРКА НАСТРОЕК EMAIL ==='))
         
+        # Читаем настройки один раз, чтобы не обращаться к LazySettings повторно
+        self.email_settings = {
+            name: getattr(settings, name, None) for name in EMAIL_SETTING_NAMES
+        }
+        
         # Показываем текущие настройки
         self.show_email_settings()
         
@@ -35,84 +66,85 @@ class Command(BaseCommand):
         
         # Отправляем тестовое письмо если запрошено
         if options.get('send_test') and options.get('test_email'):
-            self.send_test_email(options['test_email'])
+            self.send_test_email(options['test_email'], wait=options.get('wait'))
     
     def show_email_settings(self):
         """Показывает текущие настройки Django email"""
+        cfg = self.email_settings
         self.stdout.write('\n📧 Django Email Settings:')
-        self.stdout.write(f'  EMAIL_BACKEND: {settings.EMAIL_BACKEND}')
-        self.stdout.write(f'  EMAIL_HOST: {settings.EMAIL_HOST}')
-        self.stdout.write(f'  EMAIL_PORT: {settings.EMAIL_PORT}')
-        self.stdout.write(f'  EMAIL_USE_TLS: {settings.EMAIL_USE_TLS}')
-        self.stdout.write(f'  EMAIL_HOST_USER: {settings.EMAIL_HOST_USER}')
-        self.stdout.write(f'  EMAIL_HOST_PASSWORD: {"*" * len(settings.EMAIL_HOST_PASSWORD) if settings.EMAIL_HOST_PASSWORD else "НЕ УСТАНОВЛЕН"}')
-        self.stdout.write(f'  DEFAULT_FROM_EMAIL: {settings.DEFAULT_FROM_EMAIL}')
+        self.stdout.write(f'  EMAIL_BACKEND: {cfg["EMAIL_BACKEND"]}')
+        self.stdout.write(f'  EMAIL_HOST: {cfg["EMAIL_HOST"]}')
+        self.stdout.write(f'  EMAIL_PORT: {cfg["EMAIL_PORT"]}')
+        self.stdout.write(f'  EMAIL_USE_TLS: {cfg["EMAIL_USE_TLS"]}')
+        self.stdout.write(f'  EMAIL_HOST_USER: {cfg["EMAIL_HOST_USER"]}')
+        self.stdout.write(f'  EMAIL_HOST_PASSWORD: {"*" * len(cfg["EMAIL_HOST_PASSWORD"]) if cfg["EMAIL_HOST_PASSWORD"] else "НЕ УСТАНОВЛЕН"}')
+        self.stdout.write(f'  DEFAULT_FROM_EMAIL: {cfg["DEFAULT_FROM_EMAIL"]}')
         
-        if hasattr(settings, 'EMAIL_CHARSET'):
-            self.stdout.write(f'  EMAIL_CHARSET: {settings.EMAIL_CHARSET}')
-        if hasattr(settings, 'BASE_URL'):
-            self.stdout.write(f'  BASE_URL: {settings.BASE_URL}')
+        if cfg['EMAIL_CHARSET'] is not None:
+            self.stdout.write(f'  EMAIL_CHARSET: {cfg["EMAIL_CHARSET"]}')
+        if cfg['BASE_URL'] is not None:
+            self.stdout.write(f'  BASE_URL: {cfg["BASE_URL"]}')
     
     def show_env_variables(self):
         """Показывает переменные окружения связанные с email"""
         self.stdout.write('\n🔧 Environment Variables:')
         
-        email_vars = [
-            'EMAIL_BACKEND',
-            'EMAIL_HOST', 
-            'EMAIL_PORT',
-            'EMAIL_USE_TLS',
-            'EMAIL_HOST_USER',
-            'EMAIL_HOST_PASSWORD',
-            'DEFAULT_FROM_EMAIL',
-            'EMAIL_CHARSET',
-            'BASE_URL'
-        ]
-        
-        for var in email_vars:
-            value = os.environ.get(var, 'НЕ УСТАНОВЛЕНА')
+        env = dict(os.environ)
+        for var in EMAIL_SETTING_NAMES:
+            value = env.get(var, 'НЕ УСТАНОВЛЕНА')
             if 'PASSWORD' in var and value != 'НЕ УСТАНОВЛЕНА':
                 value = '*' * len(value)
             self.stdout.write(f'  {var}: {value}')
     
-    def send_test_email(self, email):
-        """Отправляет тестовое письмо"""
+    def send_test_email(self, email, wait=False):
+        """Ставит отправку тестового письма в очередь Celery"""
         self.stdout.write(f'\n📤 Отправка тестового письма на {email}...')
         
-        try:
-            # Простое тестовое письмо
-            send_mail(
-                subject='XXL OrderHub - Тест настроек email',
-                message=f'''
+        cfg = self.email_settings
+        
+        # Для backend'ов без реальной доставки подробное тело письма не нужно
+        backend = cfg['EMAIL_BACKEND'] or ''
+        if any(name in backend for name in NON_DELIVERING_BACKENDS):
+            message = 'test'
+        else:
+            message = f'''
 Тестовое письмо для проверки настроек email.
 
 Настройки:
-- EMAIL_BACKEND: {settings.EMAIL_BACKEND}
-- EMAIL_HOST: {settings.EMAIL_HOST}
-- EMAIL_PORT: {settings.EMAIL_PORT}
-- EMAIL_USE_TLS: {settings.EMAIL_USE_TLS}
-- EMAIL_HOST_USER: {settings.EMAIL_HOST_USER}
-- DEFAULT_FROM_EMAIL: {settings.DEFAULT_FROM_EMAIL}
+- EMAIL_BACKEND: {cfg['EMAIL_BACKEND']}
+- EMAIL_HOST: {cfg['EMAIL_HOST']}
+- EMAIL_PORT: {cfg['EMAIL_PORT']}
+- EMAIL_USE_TLS: {cfg['EMAIL_USE_TLS']}
+- EMAIL_HOST_USER: {cfg['EMAIL_HOST_USER']}
+- DEFAULT_FROM_EMAIL: {cfg['DEFAULT_FROM_EMAIL']}
 
 Если вы получили это письмо, настройки email работают корректно!
-                ''',
-                from_email=settings.DEFAULT_FROM_EMAIL,
-                recipient_list=[email],
-                fail_silently=False,
+                '''
+        
+        try:
+            # Простое тестовое письмо; SMTP-соединение открывает Celery worker
+            result = send_test_email_task.delay(
+                recipient=email,
+                subject='XXL OrderHub - Тест настроек email',
+                message=message,
+                from_email=cfg['DEFAULT_FROM_EMAIL'],
             )
             
-            self.stdout.write(
-                self.style.SUCCESS(f'✅ Тестовое письмо успешно отправлено на {email}')
-            )
+            self.stdout.write(f'  Задача поставлена в очередь: {result.id}')
+            
+            if wait:
+                result.get(timeout=TEST_EMAIL_WAIT_TIMEOUT)
+                self.stdout.write(
+                    self.style.SUCCESS(f'✅ Тестовое письмо успешно отправлено на {email}')
+                )
             
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'❌ Ошибка отправки письма: {str(e)}')
             )
             
-            # Показываем детали ошибки
-            import traceback
-            self.stdout.write(f'Детали ошибки:\n{traceback.format_exc()}')
+            # Детали ошибки (traceback) пишем в лог, а не собираем строкой
+            logger.exception('Test email send failed: %s', e)
     
     def check_email_backend(self):
         """Проверяет кастомный email backend"""
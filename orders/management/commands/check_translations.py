@@ -1,7 +1,10 @@
-from django.core.management.base import BaseCommand
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
 from django.conf import settings
+from io import StringIO
+import mmap
 import os
-import subprocess
+from pathlib import Path
 
 
 class Command(BaseCommand):
@@ -74,51 +77,64 @@ class Command(BaseCommand):
     
     def check_language_status(self, locale_path, lang):
         """Проверить статус конкретного языка."""
-        lang_path = os.path.join(locale_path, lang, 'LC_MESSAGES')
+        lang_path = Path(locale_path) / lang / 'LC_MESSAGES'
         
-        if not os.path.exists(lang_path):
+        # Один листинг директории вместо отдельных exists/stat для каждого файла
+        try:
+            with os.scandir(lang_path) as it:
+                entries = {entry.name: entry for entry in it}
+        except FileNotFoundError:
             self.stdout.write(
                 self.style.WARNING(f"  ⚠️ Язык {lang}: директория не найдена")
             )
             return
         
-        po_file = os.path.join(lang_path, 'django.po')
-        mo_file = os.path.join(lang_path, 'django.mo')
+        po_entry = entries.get('django.po')
+        mo_entry = entries.get('django.mo')
         
         # Проверяем .po файл
-        if os.path.exists(po_file):
-            po_size = os.path.getsize(po_file)
-            po_count = self.count_translations(po_file)
-            self.stdout.write(f"  📝 {lang}: {po_count} строк, {po_size} байт")
-        else:
+        if po_entry is None:
             self.stdout.write(
                 self.style.ERROR(f"  ❌ {lang}: файл .po не найден")
             )
             return
         
+        po_stat = po_entry.stat()
+        po_count = self.count_translations(po_entry.path)
+        self.stdout.write(f"  📝 {lang}: {po_count} строк, {po_stat.st_size} байт")
+        
         # Проверяем .mo файл
-        if os.path.exists(mo_file):
-            mo_size = os.path.getsize(mo_file)
-            mo_mtime = os.path.getmtime(mo_file)
-            po_mtime = os.path.getmtime(po_file) if os.path.exists(po_file) else 0
-            
-            if mo_mtime > po_mtime:
-                self.stdout.write(f"  ✅ {lang}: .mo файл актуален ({mo_size} байт)")
-            else:
-                self.stdout.write(
-                    self.style.WARNING(f"  ⚠️ {lang}: .mo файл устарел, нужна компиляция")
-                )
-        else:
+        if mo_entry is None:
             self.stdout.write(
                 self.style.WARNING(f"  ⚠️ {lang}: файл .mo не найден, нужна компиляция")
             )
+            return
+        
+        mo_stat = mo_entry.stat()
+        if mo_stat.st_mtime > po_stat.st_mtime:
+            self.stdout.write(f"  ✅ {lang}: .mo файл актуален ({mo_stat.st_size} байт)")
+        else:
+            self.stdout.write(
+                self.style.WARNING(f"  ⚠️ {lang}: .mo файл устарел, нужна компиляция")
+            )
     
     def count_translations(self, po_file):
         """Подсчитать количество переводов в .po файле."""
         try:
-            with open(po_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-                return content.count('msgid "')
+            with open(po_file, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return 0
+                # Считаем вхождения прямо в отображенном файле, без декодирования
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    total = 0
+                    pos = mm.find(b'msgid "')
+                    while pos != -1:
+                        total += 1
+                        pos = mm.find(b'msgid "', pos + 7)
+                    # Заголовок файла (msgid "") не является переводом
+                    if mm.find(b'msgid ""') != -1:
+                        total -= 1
+                    return total
         except Exception as e:
             self.stdout.write(f"    Ошибка чтения файла: {e}")
             return 0
@@ -129,29 +145,13 @@ class Command(BaseCommand):
             self.style.SUCCESS('📝 Обновление файлов переводов...')
         )
         
-        try:
-            # Обновляем переводы для всех языков
-            result = subprocess.run(
-                ['python', 'manage.py', 'makemessages', '--all'],
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode == 0:
-                self.stdout.write(
-                    self.style.SUCCESS('✅ Файлы переводов обновлены!')
-                )
-                self.stdout.write(result.stdout)
-            else:
-                self.stdout.write(
-                    self.style.ERROR('❌ Ошибка обновления переводов:')
-                )
-                self.stdout.write(result.stderr)
-                
-        except Exception as e:
-            self.stdout.write(
-                self.style.ERROR(f'❌ Ошибка: {e}')
-            )
+        # Обновляем переводы для всех языков
+        self._run_command(
+            'makemessages',
+            '✅ Файлы переводов обновлены!',
+            '❌ Ошибка обновления переводов:',
+            all=True,
+        )
     
     def compile_translations(self):
         """Скомпилировать переводы."""
@@ -159,25 +159,25 @@ class Command(BaseCommand):
             self.style.SUCCESS('🔧 Компиляция переводов...')
         )
         
+        self._run_command(
+            'compilemessages',
+            '✅ Переводы скомпилированы!',
+            '❌ Ошибка компиляции:',
+        )
+    
+    def _run_command(self, name, success_message, error_message, **options):
+        """Выполнить management команду в текущем процессе."""
+        out, err = StringIO(), StringIO()
+        
         try:
-            result = subprocess.run(
-                ['python', 'manage.py', 'compilemessages'],
-                capture_output=True,
-                text=True
-            )
-            
-            if result.returncode == 0:
-                self.stdout.write(
-                    self.style.SUCCESS('✅ Переводы скомпилированы!')
-                )
-                self.stdout.write(result.stdout)
-            else:
-                self.stdout.write(
-                    self.style.ERROR('❌ Ошибка компиляции:')
-                )
-                self.stdout.write(result.stderr)
-                
+            call_command(name, stdout=out, stderr=err, **options)
+        except CommandError as e:
+            self.stdout.write(self.style.ERROR(error_message))
+            self.stdout.write(f'{e}\n{err.getvalue()}')
         except Exception as e:
             self.stdout.write(
                 self.style.ERROR(f'❌ Ошибка: {e}')
             )
+        else:
+            self.stdout.write(self.style.SUCCESS(success_message))
+            self.stdout.write(out.getvalue())
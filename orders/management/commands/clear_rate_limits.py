@@ -34,16 +34,15 @@ class Command(BaseCommand):
             else:
                 actions = [action]
             
-            cleared_count = 0
-            for act in actions:
-                key = f"rate_limit:{act}:{ip}"
-                if cache.delete(key):
-                    cleared_count += 1
-                    self.stdout.write(
-                        self.style.SUCCESS(f'Очищен rate limiting для IP {ip}, действие: {act}')
-                    )
+            keys = {f"rate_limit:{act}:{ip}": act for act in actions}
+            existing = cache.get_many(list(keys))
+            cache.delete_many(list(existing))
+            for key in existing:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Очищен rate limiting для IP {ip}, действие: {keys[key]}')
+                )
             
-            if cleared_count == 0:
+            if not existing:
                 self.stdout.write(
                     self.style.WARNING(f'Rate limiting для IP {ip} не найден в кэше')
                 )
@@ -56,10 +55,8 @@ class Command(BaseCommand):
                     if key.startswith('rate_limit:'):
                         keys_to_delete.append(key)
                 
-                cleared_count = 0
-                for key in keys_to_delete:
-                    if cache.delete(key):
-                        cleared_count += 1
+                cache.delete_many(keys_to_delete)
+                cleared_count = len(keys_to_delete)
                 
                 self.stdout.write(
                     self.style.SUCCESS(f'Очищено {cleared_count} записей rate limiting')
@@ -71,10 +68,8 @@ class Command(BaseCommand):
                     if key.startswith(f'rate_limit:{action}:'):
                         keys_to_delete.append(key)
                 
-                cleared_count = 0
-                for key in keys_to_delete:
-                    if cache.delete(key):
-                        cleared_count += 1
+                cache.delete_many(keys_to_delete)
+                cleared_count = len(keys_to_delete)
                 
                 self.stdout.write(
                     self.style.SUCCESS(f'Очищено {cleared_count} записей rate limiting для действия: {action}')
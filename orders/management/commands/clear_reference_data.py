@@ -1,7 +1,5 @@
-import os
 from django.core.management.base import BaseCommand
-from django.db import transaction
-from orders.models import Country, Factory
+from orders.management.manufacturers import delete_reference_data
 
 
 class Command(BaseCommand):
@@ -39,18 +37,13 @@ class Command(BaseCommand):
         # Очищаем справочные данные
         self.stdout.write('Очистка справочных данных...')
         
-        with transaction.atomic():
-            factories_count = Factory.objects.count()
-            countries_count = Country.objects.count()
-            
-            Factory.objects.all().delete()
-            Country.objects.all().delete()
-            
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f'✅ Очищено {factories_count} фабрик и {countries_count} стран'
-                )
+        factories_count, countries_count = delete_reference_data()
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✅ Очищено {factories_count} фабрик и {countries_count} стран'
             )
+        )
         
         self.stdout.write(
             self.style.SUCCESS('✅ Справочные данные очищены!')
@@ -1,160 +1,154 @@
+from functools import reduce
+from operator import or_
+
 from django.core.management.base import BaseCommand
-from django_celery_beat.models import PeriodicTask, CrontabSchedule, IntervalSchedule
-from django.utils import timezone
+from django.db.models import Q
+from django_celery_beat.models import PeriodicTask, PeriodicTasks, CrontabSchedule, IntervalSchedule
+
+
+# Поля CrontabSchedule в порядке, в котором задаются расписания ниже
+CRONTAB_FIELDS = ('minute', 'hour', 'day_of_week', 'day_of_month', 'month_of_year')
+
+# Периодические задачи: crontab - (minute, hour, day_of_week, day_of_month, month_of_year),
+# interval - (every, period)
+PERIODIC_TASKS = [
+    # 1. Проверка просроченных заказов - каждый день в 9:00
+    {
+        'name': 'Check Overdue Orders',
+        'task': 'orders.tasks.check_overdue_orders',
+        'crontab': ('0', '9', '*', '*', '*'),
+        'description': 'Проверка просроченных заказов и отправка напоминаний',
+    },
+    # 2. Создание шаблонов уведомлений - один раз при запуске
+    {
+        'name': 'Create Default Notification Templates',
+        'task': 'orders.tasks.create_default_notification_templates',
+        'interval': (1, IntervalSchedule.DAYS),
+        'description': 'Создание шаблонов уведомлений по умолчанию',
+        'one_off': True,  # Выполнить только один раз
+    },
+    # 3. Очистка старых уведомлений - каждую неделю в воскресенье в 2:00
+    {
+        'name': 'Cleanup Old Notifications',
+        'task': 'orders.tasks.cleanup_old_notifications',
+        'crontab': ('0', '2', '0', '*', '*'),  # Воскресенье
+        'description': 'Очистка старых уведомлений (старше 30 дней)',
+    },
+    # 4. Статистика системы - каждый день в 23:00
+    {
+        'name': 'Generate System Statistics',
+        'task': 'orders.tasks.generate_system_statistics',
+        'crontab': ('0', '23', '*', '*', '*'),
+        'description': 'Генерация ежедневной статистики системы',
+    },
+    # 5. Проверка просроченных платежей - каждый день в 10:00
+    {
+        'name': 'Check Overdue Payments',
+        'task': 'orders.tasks.check_overdue_payments',
+        'crontab': ('0', '10', '*', '*', '*'),
+        'description': 'Проверка просроченных платежей и отправка уведомлений',
+    },
+    # 6. Проверка заказов без инвойсов и напоминания фабрикам - каждый день в 11:00
+    {
+        'name': 'Check Missing Invoices for Factories',
+        'task': 'orders.tasks.check_missing_invoices_for_factories',
+        'crontab': ('0', '11', '*', '*', '*'),
+        'description': 'Проверка заказов без инвойсов после 5 дней и отправка напоминаний фабрикам',
+    },
+    # 7. Пометка просроченных подтверждений операций - каждый час
+    {
+        'name': 'Expire Stale Confirmations',
+        'task': 'orders.tasks.expire_stale_confirmations',
+        'crontab': ('0', '*', '*', '*', '*'),
+        'description': 'Пометка просроченных ожидающих подтверждений как истекших',
+    },
+]
 
 
 class Command(BaseCommand):
     help = 'Setup Celery Beat periodic tasks'
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write('Setting up Celery Beat periodic tasks...')
-        
-        # 1. Проверка просроченных заказов - каждый день в 9:00
-        schedule, created = CrontabSchedule.objects.get_or_create(
-            minute='0',
-            hour='9',
-            day_of_week='*',
-            day_of_month='*',
-            month_of_year='*',
-        )
-        
-        task, created = PeriodicTask.objects.get_or_create(
-            name='Check Overdue Orders',
-            defaults={
-                'task': 'orders.tasks.check_overdue_orders',
-                'crontab': schedule,
-                'enabled': True,
-                'description': 'Проверка просроченных заказов и отправка напоминаний',
-            }
-        )
-        
-        if created:
-            self.stdout.write(self.style.SUCCESS('✓ Created task: Check Overdue Orders'))
-        else:
-            self.stdout.write(self.style.WARNING('⚠ Task already exists: Check Overdue Orders'))
-        
-        # 2. Создание шаблонов уведомлений - один раз при запуске
-        schedule_once, created = IntervalSchedule.objects.get_or_create(
-            every=1,
-            period=IntervalSchedule.DAYS,
-        )
-        
-        task_once, created = PeriodicTask.objects.get_or_create(
-            name='Create Default Notification Templates',
-            defaults={
-                'task': 'orders.tasks.create_default_notification_templates',
-                'interval': schedule_once,
-                'enabled': True,
-                'description': 'Создание шаблонов уведомлений по умолчанию',
-                'one_off': True,  # Выполнить только один раз
-            }
-        )
-        
-        if created:
-            self.stdout.write(self.style.SUCCESS('✓ Created task: Create Default Notification Templates'))
-        else:
-            self.stdout.write(self.style.WARNING('⚠ Task already exists: Create Default Notification Templates'))
-        
-        # 3. Очистка старых уведомлений - каждую неделю в воскресенье в 2:00
-        schedule_cleanup, created = CrontabSchedule.objects.get_or_create(
-            minute='0',
-            hour='2',
-            day_of_week='0',  # Воскресенье
-            day_of_month='*',
-            month_of_year='*',
-        )
-        
-        task_cleanup, created = PeriodicTask.objects.get_or_create(
-            name='Cleanup Old Notifications',
-            defaults={
-                'task': 'orders.tasks.cleanup_old_notifications',
-                'crontab': schedule_cleanup,
-                'enabled': True,
-                'description': 'Очистка старых уведомлений (старше 30 дней)',
-            }
-        )
-        
-        if created:
-            self.stdout.write(self.style.SUCCESS('✓ Created task: Cleanup Old Notifications'))
-        else:
-            self.stdout.write(self.style.WARNING('⚠ Task already exists: Cleanup Old Notifications'))
-        
-        # 4. Статистика системы - каждый день в 23:00
-        schedule_stats, created = CrontabSchedule.objects.get_or_create(
-            minute='0',
-            hour='23',
-            day_of_week='*',
-            day_of_month='*',
-            month_of_year='*',
-        )
-        
-        task_stats, created = PeriodicTask.objects.get_or_create(
-            name='Generate System Statistics',
-            defaults={
-                'task': 'orders.tasks.generate_system_statistics',
-                'crontab': schedule_stats,
-                'enabled': True,
-                'description': 'Генерация ежедневной статистики системы',
-            }
-        )
-        
-        if created:
-            self.stdout.write(self.style.SUCCESS('✓ Created task: Generate System Statistics'))
-        else:
-            self.stdout.write(self.style.WARNING('⚠ Task already exists: Generate System Statistics'))
-        
-        # 5. Проверка просроченных платежей - каждый день в 10:00
-        schedule_payments, created = CrontabSchedule.objects.get_or_create(
-            minute='0',
-            hour='10',
-            day_of_week='*',
-            day_of_month='*',
-            month_of_year='*',
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verbose',
+            action='store_true',
+            help='Show all periodic tasks after setup',
         )
-        
-        task_payments, created = PeriodicTask.objects.get_or_create(
-            name='Check Overdue Payments',
-            defaults={
-                'task': 'orders.tasks.check_overdue_payments',
-                'crontab': schedule_payments,
-                'enabled': True,
-                'description': 'Проверка просроченных платежей и отправка уведомлений',
-            }
-        )
-        
-        if created:
-            self.stdout.write(self.style.SUCCESS('✓ Created task: Check Overdue Payments'))
-        else:
-            self.stdout.write(self.style.WARNING('⚠ Task already exists: Check Overdue Payments'))
-        
-        # 6. Проверка заказов без инвойсов и напоминания фабрикам - каждый день в 11:00
-        schedule_invoice_reminder, created = CrontabSchedule.objects.get_or_create(
-            minute='0',
-            hour='11',
-            day_of_week='*',
-            day_of_month='*',
-            month_of_year='*',
+
+    def handle(self, *args, **options):
+        self.stdout.write('Setting up Celery Beat periodic tasks...')
+
+        # Все расписания и существующие задачи получаем пакетно,
+        # а не get_or_create на каждую задачу
+        crontabs = self.get_or_create_crontabs(
+            {definition['crontab'] for definition in PERIODIC_TASKS if 'crontab' in definition}
         )
-        
-        task_invoice_reminder, created = PeriodicTask.objects.get_or_create(
-            name='Check Missing Invoices for Factories',
-            defaults={
-                'task': 'orders.tasks.check_missing_invoices_for_factories',
-                'crontab': schedule_invoice_reminder,
-                'enabled': True,
-                'description': 'Проверка заказов без инвойсов после 5 дней и отправка напоминаний фабрикам',
-            }
+        intervals = {
+            spec: IntervalSchedule.objects.get_or_create(every=spec[0], period=spec[1])[0]
+            for spec in {definition['interval'] for definition in PERIODIC_TASKS if 'interval' in definition}
+        }
+
+        existing_names = set(
+            PeriodicTask.objects.filter(
+                name__in=[definition['name'] for definition in PERIODIC_TASKS]
+            ).values_list('name', flat=True)
         )
-        
-        if created:
-            self.stdout.write(self.style.SUCCESS('✓ Created task: Check Missing Invoices for Factories'))
-        else:
-            self.stdout.write(self.style.WARNING('⚠ Task already exists: Check Missing Invoices for Factories'))
-        
+
+        new_tasks = []
+        for definition in PERIODIC_TASKS:
+            if definition['name'] in existing_names:
+                continue
+            new_tasks.append(PeriodicTask(
+                name=definition['name'],
+                task=definition['task'],
+                crontab=crontabs.get(definition.get('crontab')),
+                interval=intervals.get(definition.get('interval')),
+                enabled=True,
+                description=definition['description'],
+                one_off=definition.get('one_off', False),
+            ))
+
+        if new_tasks:
+            PeriodicTask.objects.bulk_create(new_tasks)
+            # bulk_create не отправляет сигналы, поэтому сообщаем beat об изменениях сами
+            PeriodicTasks.update_changed()
+
+        for definition in PERIODIC_TASKS:
+            name = definition['name']
+            if name in existing_names:
+                self.stdout.write(self.style.WARNING(f'⚠ Task already exists: {name}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ Created task: {name}'))
+
         self.stdout.write(self.style.SUCCESS('Successfully set up Celery Beat periodic tasks!'))
-        
-        # Показываем список всех задач
-        self.stdout.write('\nCurrent periodic tasks:')
-        for task in PeriodicTask.objects.all():
-            status = '✓ Enabled' if task.enabled else '✗ Disabled'
-            self.stdout.write(f'  - {task.name}: {status}')
+
+        # Показываем список всех задач (задач может быть много - только по запросу)
+        if options['verbose']:
+            self.stdout.write('\nCurrent periodic tasks:')
+            tasks = PeriodicTask.objects.values_list('name', 'enabled').iterator(chunk_size=500)
+            for name, enabled in tasks:
+                status = '✓ Enabled' if enabled else '✗ Disabled'
+                self.stdout.write(f'  - {name}: {status}')
+
+    def get_or_create_crontabs(self, specs):
+        """Получить CrontabSchedule для набора расписаний, создав недостающие одним запросом"""
+        query = reduce(or_, (Q(**dict(zip(CRONTAB_FIELDS, spec))) for spec in specs))
+
+        def load():
+            return {
+                tuple(getattr(schedule, field) for field in CRONTAB_FIELDS): schedule
+                for schedule in CrontabSchedule.objects.filter(query)
+            }
+
+        crontabs = load()
+        missing = [
+            CrontabSchedule(**dict(zip(CRONTAB_FIELDS, spec)))
+            for spec in specs
+            if spec not in crontabs
+        ]
+        if missing:
+            CrontabSchedule.objects.bulk_create(missing)
+            # Перечитываем, чтобы получить id на любых БД
+            crontabs = load()
+
+        return crontabs
@@ -1,5 +1,8 @@
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from orders.management.manufacturers import (
+    delete_reference_data, extract_country_code, get_country_name, read_manufacturers,
+)
 from orders.models import Country, Factory
 
 
@@ -18,8 +21,7 @@ class Command(BaseCommand):
         
         if clear_existing:
             self.stdout.write('Очистка существующих данных...')
-            Factory.objects.all().delete()
-            Country.objects.all().delete()
+            delete_reference_data()
             self.stdout.write(
                 self.style.SUCCESS('✅ Данные очищены')
             )
@@ -40,7 +42,6 @@ class Command(BaseCommand):
                 return
         
         # Загружаем данные из JSON файла
-        import json
         import os
         
         json_file = 'manufacturer_fixture.json'
@@ -50,60 +51,66 @@ class Command(BaseCommand):
             )
             return
         
-        with open(json_file, 'r', encoding='utf-8') as f:
-            manufacturers_data = json.load(f)
+        # Собираем страны и фабрики одним проходом по данным
+        countries = {}  # код страны -> название
+        factories = {}  # название фабрики -> (код страны, email, телефон)
+        manufacturers_count = 0
         
-        self.stdout.write(f'Найдено {len(manufacturers_data)} производителей')
+        for i, manufacturer_data in enumerate(read_manufacturers(json_file)):
+            manufacturers_count = i + 1
+            try:
+                fields = manufacturer_data['fields']
+                name = fields['name']
+                email = fields['email_address']
+                phone = fields.get('phone_number', '')
+                
+                # Извлекаем страну из названия
+                country_code = extract_country_code(name)
+                if country_code not in countries:
+                    countries[country_code] = get_country_name(country_code)
+                
+                factories.setdefault(name, (country_code, email, phone))
+                
+                # Показываем прогресс
+                if (i + 1) % 50 == 0:
+                    self.stdout.write(f'Обработано {i + 1}...')
+                
+            except Exception as e:
+                self.stdout.write(
+                    self.style.WARNING(f'Ошибка при обработке {name}: {str(e)}')
+                )
+                continue
         
-        # Создаем страны и фабрики
-        countries_created = set()
-        factories_created = 0
+        self.stdout.write(f'Найдено {manufacturers_count} производителей')
         
+        # Создаем недостающие записи пакетно вместо get_or_create на каждую строку
         with transaction.atomic():
-            for i, manufacturer_data in enumerate(manufacturers_data):
-                try:
-                    fields = manufacturer_data['fields']
-                    name = fields['name']
-                    email = fields['email_address']
-                    phone = fields.get('phone_number', '')
-                    
-                    # Извлекаем страну из названия
-                    country_code = self.extract_country_code(name)
-                    country_name = self.get_country_name(country_code)
-                    
-                    # Создаем или получаем страну
-                    country, country_created = Country.objects.get_or_create(
-                        code=country_code,
-                        defaults={'name': country_name}
-                    )
-                    
-                    if country_created:
-                        countries_created.add(country_name)
-                    
-                    # Создаем фабрику
-                    factory, factory_created = Factory.objects.get_or_create(
-                        name=name,
-                        defaults={
-                            'country': country,
-                            'email': email,
-                            'phone': phone,
-                            'contact_person': '',
-                            'address': ''
-                        }
-                    )
-                    
-                    if factory_created:
-                        factories_created += 1
-                    
-                    # Показываем прогресс
-                    if (i + 1) % 50 == 0:
-                        self.stdout.write(f'Обработано {i + 1}/{len(manufacturers_data)}...')
-                    
-                except Exception as e:
-                    self.stdout.write(
-                        self.style.WARNING(f'Ошибка при обработке {name}: {str(e)}')
-                    )
-                    continue
+            existing_codes = set(Country.objects.values_list('code', flat=True))
+            new_countries = [
+                Country(code=code, name=country_name)
+                for code, country_name in countries.items()
+                if code not in existing_codes
+            ]
+            countries_created = Country.objects.bulk_create(new_countries, ignore_conflicts=True)
+            country_map = {
+                country.code: country
+                for country in Country.objects.filter(code__in=countries)
+            }
+            
+            existing_names = set(Factory.objects.values_list('name', flat=True))
+            new_factories = [
+                Factory(
+                    name=name,
+                    country=country_map[country_code],
+                    email=email,
+                    phone=phone,
+                    contact_person='',
+                    address=''
+                )
+                for name, (country_code, email, phone) in factories.items()
+                if name not in existing_names
+            ]
+            factories_created = len(Factory.objects.bulk_create(new_factories, batch_size=1000))
         
         self.stdout.write(
             self.style.SUCCESS(
@@ -116,61 +123,5 @@ class Command(BaseCommand):
         # Выводим список созданных стран
         if countries_created:
             self.stdout.write('\n🌍 Созданные страны:')
-            for country in sorted(countries_created):
-                self.stdout.write(f'  - {country}')
-    
-    def extract_country_code(self, name):
-        """Извлекает код страны из названия фабрики"""
-        if '(' in name and ')' in name:
-            parts = name.split('(')
-            if len(parts) > 1:
-                country_part = parts[-1].rstrip(')')
-                # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Безопасный доступ к split()[0]
-                country_parts = country_part.split()
-                if country_parts:
-                    country_code = country_parts[0]
-                    country_code = country_code.strip(')').strip()
-                    
-                    # Проверяем, что код не слишком длинный
-                    if len(country_code) <= 3:
-                        return country_code
-        
-        return "UNKNOWN"
-    
-    def get_country_name(self, country_code):
-        """Получает полное название страны по коду"""
-        country_names = {
-            'IT': 'Италия',
-            'TR': 'Турция',
-            'DE': 'Германия',
-            'FR': 'Франция',
-            'ES': 'Испания',
-            'PL': 'Польша',
-            'RO': 'Румыния',
-            'BG': 'Болгария',
-            'HU': 'Венгрия',
-            'CZ': 'Чехия',
-            'SK': 'Словакия',
-            'HR': 'Хорватия',
-            'SI': 'Словения',
-            'AT': 'Австрия',
-            'CH': 'Швейцария',
-            'NL': 'Нидерланды',
-            'BE': 'Бельгия',
-            'DK': 'Дания',
-            'SE': 'Швеция',
-            'NO': 'Норвегия',
-            'FI': 'Финляндия',
-            'PT': 'Португалия',
-            'GR': 'Греция',
-            'CY': 'Кипр',
-            'MT': 'Мальта',
-            'IE': 'Ирландия',
-            'LU': 'Люксембург',
-            'EE': 'Эстония',
-            'LV': 'Латвия',
-            'LT': 'Литва',
-            'UNKNOWN': 'Неизвестная страна'
-        }
-        
-        return country_names.get(country_code, f'Страна {country_code}')
+            for country in sorted(countries_created, key=lambda c: c.name):
+                self.stdout.write(f'  - {country.name}')
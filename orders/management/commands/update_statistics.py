@@ -1,8 +1,21 @@
+import time
+
 from django.core.management.base import BaseCommand
 from django.core.cache import cache
+from django.db.models import Count
+from orders.cache_utils import bump_public_statistics_version, get_public_statistics_cache_key
 from orders.models import Order, Factory, Country
 
 
+STATISTICS_CACHE_TIMEOUT = 600  # 10 минут
+
+# Блокировка пересчета: пока один процесс считает статистику, остальные ждут его результат
+STATISTICS_LOCK_KEY = 'public_statistics:lock'
+STATISTICS_LOCK_TIMEOUT = 30
+STATISTICS_LOCK_WAIT = 10
+STATISTICS_LOCK_POLL_INTERVAL = 0.1
+
+
 class Command(BaseCommand):
     """
     Команда для обновления статистики системы.
@@ -48,7 +61,7 @@ class Command(BaseCommand):
         self.stdout.write(f"  👥 Активных пользователей: {stats['active_users']}")
         
         # Проверяем кэш
-        cached_stats = cache.get('public_statistics')
+        cached_stats = cache.get(get_public_statistics_cache_key())
         if cached_stats:
             self.stdout.write(
                 self.style.WARNING('\n💾 Статистика кэширована')
@@ -64,8 +77,8 @@ class Command(BaseCommand):
             self.style.SUCCESS('🔄 Обновление статистики системы...')
         )
         
-        # Очищаем кэш
-        cache.delete('public_statistics')
+        # Инвалидируем кэш: читатели сразу переходят на новый ключ
+        bump_public_statistics_version()
         
         # Получаем свежие данные
         stats = self._get_fresh_statistics()
@@ -88,11 +101,8 @@ class Command(BaseCommand):
             self.style.SUCCESS('🚀 Принудительное обновление статистики...')
         )
         
-        # Получаем свежие данные
-        stats = self._get_fresh_statistics()
-        
-        # Принудительно обновляем кэш
-        cache.set('public_statistics', stats, 600)  # 10 минут
+        # Получаем свежие данные и принудительно обновляем кэш
+        stats = self._compute_with_lock()
         
         self.stdout.write(
             self.style.SUCCESS('✅ Статистика принудительно обновлена!')
@@ -106,11 +116,45 @@ class Command(BaseCommand):
             self.style.SUCCESS('\n💾 Кэш обновлен и будет действителен 10 минут.')
         )
     
+    def _compute_with_lock(self):
+        """
+        Пересчитать статистику и сохранить в кэш.
+        
+        Если статистику уже пересчитывает другой процесс (например, задача
+        Celery Beat), не запускаем те же запросы повторно, а ждем его результат.
+        """
+        if cache.add(STATISTICS_LOCK_KEY, '1', STATISTICS_LOCK_TIMEOUT):
+            try:
+                stats = self._get_fresh_statistics()
+                cache.set(bump_public_statistics_version(), stats, STATISTICS_CACHE_TIMEOUT)
+                return stats
+            finally:
+                cache.delete(STATISTICS_LOCK_KEY)
+        
+        deadline = time.monotonic() + STATISTICS_LOCK_WAIT
+        while time.monotonic() < deadline:
+            if cache.get(STATISTICS_LOCK_KEY) is None:
+                stats = cache.get(get_public_statistics_cache_key())
+                if stats is not None:
+                    return stats
+                break
+            time.sleep(STATISTICS_LOCK_POLL_INTERVAL)
+        
+        # Другой процесс не успел или не смог сохранить результат - считаем сами
+        stats = self._get_fresh_statistics()
+        cache.set(bump_public_statistics_version(), stats, STATISTICS_CACHE_TIMEOUT)
+        return stats
+    
     def _get_fresh_statistics(self):
         """Получить свежую статистику из базы данных."""
+        # Оба счетчика по заказам - за один проход по таблице
+        order_stats = Order.objects.aggregate(
+            total=Count('id'),
+            active_users=Count('employee', distinct=True),
+        )
         return {
-            'total_orders': Order.objects.count(),
+            'total_orders': order_stats['total'],
             'total_factories': Factory.objects.count(),
             'total_countries': Country.objects.count(),
-            'active_users': Order.objects.values('employee').distinct().count(),
+            'active_users': order_stats['active_users'],
         }
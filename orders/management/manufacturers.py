@@ -0,0 +1,116 @@
+"""
+Общие функции для management команд загрузки производителей
+и работы со справочными данными (страны и фабрики).
+"""
+
+import json
+import re
+
+from django.db import transaction
+
+from orders.cache_utils import clear_factories_cache
+from orders.models import Country, Factory, Order
+
+# Код страны - до 3 символов в последних скобках названия:
+# "Factory_(IT)", "Factory (TR) 18.12.2024", "Factory(PL)18.12.2024"
+COUNTRY_CODE_RE = re.compile(r'.*\(\s*([^\s()]{1,3})[\s)]')
+
+# Названия стран по коду
+COUNTRY_NAMES = {
+    'IT': 'Италия',
+    'CN': 'Китай',
+    'TR': 'Турция',
+    'DE': 'Германия',
+    'FR': 'Франция',
+    'ES': 'Испания',
+    'PL': 'Польша',
+    'RO': 'Румыния',
+    'BG': 'Болгария',
+    'HU': 'Венгрия',
+    'CZ': 'Чехия',
+    'SK': 'Словакия',
+    'HR': 'Хорватия',
+    'SI': 'Словения',
+    'AT': 'Австрия',
+    'CH': 'Швейцария',
+    'NL': 'Нидерланды',
+    'BE': 'Бельгия',
+    'DK': 'Дания',
+    'SE': 'Швеция',
+    'NO': 'Норвегия',
+    'FI': 'Финляндия',
+    'PT': 'Португалия',
+    'GR': 'Греция',
+    'CY': 'Кипр',
+    'MT': 'Мальта',
+    'IE': 'Ирландия',
+    'LU': 'Люксембург',
+    'EE': 'Эстония',
+    'LV': 'Латвия',
+    'LT': 'Литва',
+    'UNKNOWN': 'Неизвестная страна',
+}
+
+# Допустимые коды стран (все остальное из скобок считается мусором)
+VALID_COUNTRY_CODES = frozenset(COUNTRY_NAMES) - {'UNKNOWN'}
+
+
+def extract_country_code(name):
+    """Извлекает код страны из названия фабрики"""
+    # Ищем код страны в последних скобках названия
+    match = COUNTRY_CODE_RE.match(name)
+    if match and match.group(1) in VALID_COUNTRY_CODES:
+        return match.group(1)
+
+    # Если код не найден или неизвестен, возвращаем "UNKNOWN"
+    return "UNKNOWN"
+
+
+def get_country_name(country_code):
+    """Получает полное название страны по коду"""
+    return COUNTRY_NAMES.get(country_code, f'Страна {country_code}')
+
+
+def read_manufacturers(file_path):
+    """
+    Читает JSON фикстуру производителей (массив объектов).
+
+    Args:
+        file_path: Путь к JSON файлу
+
+    Returns:
+        list: Записи производителей из фикстуры
+    """
+    with open(file_path, 'r', encoding='utf-8') as f:
+        manufacturers = json.load(f)
+
+    if not isinstance(manufacturers, list):
+        raise ValueError(f'Файл {file_path} должен содержать JSON массив')
+    return manufacturers
+
+
+def delete_reference_data():
+    """
+    Удаляет все фабрики и страны.
+
+    Если на фабрики не ссылается ни один заказ, каждая таблица очищается
+    одним DELETE без выборки первичных ключей и сигналов на каждую запись;
+    кэш фабрик сбрасывается один раз. Иначе используется обычное удаление
+    ORM с каскадом на связанные заказы.
+
+    Returns:
+        tuple: (количество удаленных фабрик, количество удаленных стран)
+    """
+    with transaction.atomic():
+        factories_count = Factory.objects.count()
+        countries_count = Country.objects.count()
+
+        if Order.objects.exists():
+            Factory.objects.all().delete()
+            Country.objects.all().delete()
+        else:
+            Factory.objects.all()._raw_delete(Factory.objects.db)
+            Country.objects.all()._raw_delete(Country.objects.db)
+            clear_factories_cache()
+
+    return factories_count, countries_count
@@ -1,5 +1,4 @@
 from django.utils.deprecation import MiddlewareMixin
-from django.contrib import messages
 
 
 class MessageCleanupMiddleware(MiddlewareMixin):
@@ -10,9 +9,12 @@ class MessageCleanupMiddleware(MiddlewareMixin):
     def process_response(self, request, response):
         # Очищаем сообщения только для успешных ответов (статус 200)
         if response.status_code == 200:
-            # Получаем все сообщения и помечаем их как использованные
-            storage = messages.get_messages(request)
-            # Просто итерируемся по сообщениям, чтобы пометить их как использованные
-            list(storage)
+            storage = getattr(request, '_messages', None)
+            if storage is not None:
+                # Помечаем сообщения как использованные и отбрасываем новые,
+                # как это делает итерация по storage, но без загрузки
+                # сохраненных сообщений из cookie/сессии и без создания списка
+                storage.used = True
+                storage._queued_messages.clear()
         
         return response
@@ -2,17 +2,38 @@ import time
 import logging
 from django.core.cache import cache
 from django.http import HttpResponse
-from django.utils.deprecation import MiddlewareMixin
 from .constants import ApiConstants
 
 logger = logging.getLogger('orders')
 
 
-class RequestLoggingMiddleware(MiddlewareMixin):
+def get_client_ip(request):
+    """Получение IP адреса клиента"""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Безопасное извлечение первого IP
+    # partition не создает список из всех адресов цепочки прокси
+    ip = x_forwarded_for.partition(',')[0].strip() if x_forwarded_for else None
+    if not ip:
+        ip = request.META.get('REMOTE_ADDR')
+    return ip or 'unknown'
+
+
+class RequestLoggingMiddleware:
     """Middleware для логирования запросов"""
     
+    # Логируем только важные запросы
+    LOGGED_PREFIXES = ('/orders/', '/admin/')
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        self.process_request(request)
+        response = self.get_response(request)
+        return self.process_response(request, response)
+    
     def process_request(self, request):
-        request.start_time = time.time()
+        request.start_time = time.monotonic()
         # Логируем POST запросы сразу, до обработки файлов
         # ВАЖНО: request.FILES может быть еще не доступен здесь, т.к. Django парсит multipart/form-data
         # только когда к request.FILES обращаются. 
@@ -24,94 +45,77 @@ class RequestLoggingMiddleware(MiddlewareMixin):
             if hasattr(request, 'user') and request.user.is_authenticated:
                 username = request.user.username
             logger.info(
-                f"MIDDLEWARE: POST {request.path} - "
-                f"User: {username} - "
-                f"Content-Length: {content_length} bytes"
+                "MIDDLEWARE: POST %s - User: %s - Content-Length: %s bytes",
+                request.path, username, content_length
             )
         return None
     
     def process_response(self, request, response):
-        if hasattr(request, 'start_time'):
-            duration = time.time() - request.start_time
+        # Не собираем данные для записи, если уровень INFO отключен
+        if (hasattr(request, 'start_time')
+                and request.path.startswith(self.LOGGED_PREFIXES)
+                and logger.isEnabledFor(logging.INFO)):
+            duration = time.monotonic() - request.start_time
             
-            # Логируем только важные запросы
-            if request.path.startswith('/orders/') or request.path.startswith('/admin/'):
-                # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Безопасный доступ к request.user
-                username = 'Anonymous'
-                if hasattr(request, 'user') and request.user.is_authenticated:
-                    username = request.user.username
-                logger.info(
-                    f"{request.method} {request.path} - "
-                    f"Status: {response.status_code} - "
-                    f"Duration: {duration:.3f}s - "
-                    f"User: {username} - "
-                    f"IP: {self.get_client_ip(request)}"
-                )
+            # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Безопасный доступ к request.user
+            username = 'Anonymous'
+            if hasattr(request, 'user') and request.user.is_authenticated:
+                username = request.user.username
+            logger.info(
+                "%s %s - Status: %s - Duration: %.3fs - User: %s - IP: %s",
+                request.method, request.path, response.status_code,
+                duration, username, get_client_ip(request)
+            )
         
         return response
-    
-    def get_client_ip(self, request):
-        """Получение IP адреса клиента"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Безопасное извлечение первого IP
-            ip = x_forwarded_for.split(',')[0].strip() if x_forwarded_for else None
-            if not ip:
-                ip = request.META.get('REMOTE_ADDR')
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip or 'unknown'
 
 
-class RateLimitMiddleware(MiddlewareMixin):
+class RateLimitMiddleware:
     """Middleware для ограничения частоты запросов"""
     
+    # Статические файлы, админка, страницы управления и API - без ограничений
+    SKIP_PREFIXES = ('/static/', '/media/', '/admin/', '/countries/', '/factories/', '/api/')
+    
+    # Пути загрузки файлов (проверка за O(1) вместо сравнения со списком)
+    FILE_UPLOAD_PATHS = frozenset(('/orders/create/', '/orders/upload-invoice/'))
+    
+    def __init__(self, get_response):
+        self.get_response = get_response
+    
+    def __call__(self, request):
+        response = self.process_request(request)
+        if response is None:
+            response = self.get_response(request)
+        return response
+    
     def process_request(self, request):
-        # Пропускаем статические файлы, админку и страницы управления
-        if (request.path.startswith('/static/') or 
-            request.path.startswith('/media/') or
-            request.path.startswith('/admin/') or
-            request.path.startswith('/countries/') or
-            request.path.startswith('/factories/') or
-            request.path.startswith('/api/')):
-            return None
+        path = request.path
         
-        # Получаем IP адреса
-        ip = self.get_client_ip(request)
+        # Пропускаем статические файлы, админку, страницы управления и API
+        if path.startswith(self.SKIP_PREFIXES):
+            return None
         
         # Проверяем лимит только для загрузки файлов
-        if request.path in ['/orders/create/', '/orders/upload-invoice/']:
+        if path in self.FILE_UPLOAD_PATHS:
+            ip = get_client_ip(request)
             if self.is_rate_limited(ip, 'file_upload', limit=ApiConstants.FILE_UPLOAD_RATE_LIMIT, window=3600):
                 logger.warning(f"Rate limit exceeded for file upload from IP: {ip}")
                 return HttpResponse("Слишком много загрузок файлов. Попробуйте позже.", status=429)
         
-        # Проверяем общий лимит запросов только для API endpoints
-        if request.path.startswith('/api/'):
-            if self.is_rate_limited(ip, 'api', limit=ApiConstants.API_RATE_LIMIT, window=3600):
-                logger.warning(f"Rate limit exceeded for API requests from IP: {ip}")
-                return HttpResponse("Слишком много запросов. Попробуйте позже.", status=429)
-        
         return None
     
     def is_rate_limited(self, ip, action, limit, window):
         """Проверка превышения лимита"""
         key = f"rate_limit:{action}:{ip}"
-        current = cache.get(key, 0)
         
-        if current >= limit:
-            return True
+        # add() создает счетчик с TTL только если его еще нет,
+        # incr() атомарен (INCR в Redis) - без гонки между get и set
+        cache.add(key, 0, window)
+        try:
+            current = cache.incr(key)
+        except ValueError:
+            # Ключ истек между add() и incr() - начинаем новое окно
+            cache.set(key, 1, window)
+            current = 1
         
-        cache.set(key, current + 1, window)
-        return False
-    
-    def get_client_ip(self, request):
-        """Получение IP адреса клиента"""
-        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-        if x_forwarded_for:
-            # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Безопасное извлечение первого IP
-            ip = x_forwarded_for.split(',')[0].strip() if x_forwarded_for else None
-            if not ip:
-                ip = request.META.get('REMOTE_ADDR')
-        else:
-            ip = request.META.get('REMOTE_ADDR')
-        return ip or 'unknown'
+        return current > limit
@@ -5,6 +5,35 @@ from django.db import migrations, models
 import django.db.models.deletion
 
 
+# Варианты выбора для полей моделей ниже
+AUDIT_ACTION_CHOICES = (
+    ('created', 'Создан'),
+    ('updated', 'Обновлен'),
+    ('status_changed', 'Изменен статус'),
+    ('file_uploaded', 'Загружен файл'),
+    ('file_downloaded', 'Скачан файл'),
+    ('sent', 'Отправлен'),
+    ('completed', 'Завершен'),
+    ('cancelled', 'Отменен'),
+    ('deleted', 'Удален'),
+)
+
+CONFIRMATION_ACTION_CHOICES = (
+    ('send_order', 'Отправка заказа'),
+    ('upload_invoice', 'Загрузка инвойса'),
+    ('complete_order', 'Завершение заказа'),
+    ('cancel_order', 'Отмена заказа'),
+    ('delete_order', 'Удаление заказа'),
+)
+
+CONFIRMATION_STATUS_CHOICES = (
+    ('pending', 'Ожидает подтверждения'),
+    ('confirmed', 'Подтверждено'),
+    ('rejected', 'Отклонено'),
+    ('expired', 'Истекло'),
+)
+
+
 class Migration(migrations.Migration):
 
     dependencies = [
@@ -12,17 +41,16 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
-        # Помечаем существующие таблицы как уже примененные
-        migrations.RunSQL(
-            "SELECT 1;",  # Ничего не делаем, просто помечаем как выполненное
-            reverse_sql="SELECT 1;",
+        # Помечаем существующие таблицы как уже примененные (только состояние, без запросов к БД)
+        migrations.SeparateDatabaseAndState(
+            database_operations=[],
             state_operations=[
                 # Создаем состояние для OrderAuditLog
                 migrations.CreateModel(
                     name='OrderAuditLog',
                     fields=[
                         ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                        ('action', models.CharField(choices=[('created', 'Создан'), ('updated', 'Обновлен'), ('status_changed', 'Изменен статус'), ('file_uploaded', 'Загружен файл'), ('file_downloaded', 'Скачан файл'), ('sent', 'Отправлен'), ('completed', 'Завершен'), ('cancelled', 'Отменен'), ('deleted', 'Удален')], max_length=20, verbose_name='Действие')),
+                        ('action', models.CharField(choices=AUDIT_ACTION_CHOICES, max_length=20, verbose_name='Действие')),
                         ('old_value', models.TextField(blank=True, verbose_name='Старое значение')),
                         ('new_value', models.TextField(blank=True, verbose_name='Новое значение')),
                         ('field_name', models.CharField(blank=True, max_length=50, verbose_name='Поле')),
@@ -44,8 +72,8 @@ class Migration(migrations.Migration):
                     name='OrderConfirmation',
                     fields=[
                         ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
-                        ('action', models.CharField(choices=[('send_order', 'Отправка заказа'), ('upload_invoice', 'Загрузка инвойса'), ('complete_order', 'Завершение заказа'), ('cancel_order', 'Отмена заказа'), ('delete_order', 'Удаление заказа')], max_length=20, verbose_name='Действие')),
-                        ('status', models.CharField(choices=[('pending', 'Ожидает подтверждения'), ('confirmed', 'Подтверждено'), ('rejected', 'Отклонено'), ('expired', 'Истекло')], default='pending', max_length=20, verbose_name='Статус')),
+                        ('action', models.CharField(choices=CONFIRMATION_ACTION_CHOICES, max_length=20, verbose_name='Действие')),
+                        ('status', models.CharField(choices=CONFIRMATION_STATUS_CHOICES, default='pending', max_length=20, verbose_name='Статус')),
                         ('confirmation_data', models.JSONField(default=dict, verbose_name='Данные подтверждения')),
                         ('comments', models.TextField(blank=True, verbose_name='Комментарии')),
                         ('rejection_reason', models.TextField(blank=True, verbose_name='Причина отклонения')),
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-15 22:43
+
+import orders.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0018_order_factory_reminder_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='order',
+            name='excel_file',
+            field=models.FileField(upload_to='orders/excel/', validators=[orders.validators.validate_excel_file], verbose_name='Excel файл заказа'),
+        ),
+        migrations.AlterField(
+            model_name='order',
+            name='invoice_file',
+            field=models.FileField(blank=True, null=True, upload_to='orders/invoices/', validators=[orders.validators.validate_pdf_file], verbose_name='PDF файл инвойса'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.4 on 2026-10-15 22:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0020_order_file_validators'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='factory',
+            index=models.Index(fields=['name'], name='factory_name_idx'),
+        ),
+    ]
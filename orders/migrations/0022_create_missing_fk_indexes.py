@@ -0,0 +1,46 @@
+# Generated manually to create foreign key indexes missing after 0011
+
+from django.db import migrations
+
+
+# Таблицы из 0011_create_missing_tables созданы сырым SQL, поэтому индексы по внешним
+# ключам, которые Django считает существующими (db_index=True), в БД не создавались.
+# order_id в orders_orderconfirmation покрыт индексом conf_order_status_idx,
+# user_id в orders_userprofile - ограничением UNIQUE.
+FK_INDEXES = [
+    ('orders_orderauditlog', 'order_id'),
+    ('orders_orderauditlog', 'user_id'),
+    ('orders_orderconfirmation', 'requested_by_id'),
+    ('orders_orderconfirmation', 'confirmed_by_id'),
+]
+
+
+def create_fk_indexes(apps, schema_editor):
+    """Создает индексы CONCURRENTLY, не блокируя запись в таблицы"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    quote_name = schema_editor.quote_name
+    for table, column in FK_INDEXES:
+        # Имя как у индекса, который создал бы сам Django, - если таблица была создана
+        # обычной миграцией, IF NOT EXISTS не даст создать дубликат
+        index_name = schema_editor._create_index_name(table, [column])
+        schema_editor.execute(
+            f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote_name(index_name)} '
+            f'ON {quote_name(table)} ({quote_name(column)})'
+        )
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY нельзя выполнять внутри транзакции
+    atomic = False
+
+    dependencies = [
+        ('orders', '0021_factory_name_idx'),
+    ]
+
+    operations = [
+        # Обратная операция ничего не удаляет: индексы с такими именами могли существовать до миграции
+        migrations.RunPython(create_fk_indexes, migrations.RunPython.noop),
+    ]
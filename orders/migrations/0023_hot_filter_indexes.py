@@ -0,0 +1,27 @@
+# Generated by Django 5.1.4 on 2026-10-15 23:02
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0022_create_missing_fk_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'is_read', '-created_at'], name='notif_user_read_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(condition=models.Q(('status', 'sent')), fields=['sent_at'], name='order_sent_partial_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='orderauditlog',
+            index=models.Index(fields=['order', '-timestamp'], name='audit_order_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.4 on 2026-10-15 23:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+SINGLE_EVENT_TYPES = ('order_uploaded', 'invoice_received', 'order_completed')
+
+
+def delete_duplicate_notifications(apps, schema_editor):
+    """Удаляет повторные уведомления о разовых событиях, оставляя самое раннее"""
+    Notification = apps.get_model('orders', 'Notification')
+    first_ids = (
+        Notification.objects.filter(notification_type__in=SINGLE_EVENT_TYPES)
+        .values('user_id', 'order_id', 'notification_type')
+        .annotate(first_id=models.Min('id'))
+        .values('first_id')
+    )
+    Notification.objects.filter(notification_type__in=SINGLE_EVENT_TYPES).exclude(
+        id__in=first_ids
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0024_notification_user_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_duplicate_notifications, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='notification',
+            constraint=models.UniqueConstraint(condition=models.Q(('notification_type__in', SINGLE_EVENT_TYPES)), fields=('user', 'order', 'notification_type'), name='notif_unique_per_event'),
+        ),
+    ]
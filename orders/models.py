@@ -1,8 +1,12 @@
+from datetime import date, timedelta
+from functools import lru_cache
 from typing import Optional, Dict, Any, List
-from django.db import models
-from django.contrib.auth.models import User
+from django.db import models, transaction
 from django.utils import timezone
+from django.utils.functional import cached_property
+from django.core.exceptions import ValidationError
 from django.core.validators import FileExtensionValidator
+from django.template import Context, Template
 from django.template.loader import render_to_string
 from django.conf import settings
 from .validators import validate_excel_file, validate_pdf_file, validate_safe_filename
@@ -21,7 +25,7 @@ class UserProfile(models.Model):
     """
 
     user = models.OneToOneField(
-        User,
+        settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         verbose_name="Пользователь",
         related_name="profile",
@@ -110,12 +114,42 @@ class Factory(models.Model):
         verbose_name = "Фабрика"
         verbose_name_plural = "Фабрики"
         ordering = ["country", "name"]
+        indexes = [
+            # Поиск дубликатов по имени (check_data_integrity) и сортировка
+            models.Index(fields=["name"], name="factory_name_idx"),
+        ]
 
     def __str__(self):
         country_name = self.country.name if self.country else "Без страны"
         return f"{self.name} ({country_name})"
 
 
+class OrderQuerySet(models.QuerySet):
+    """QuerySet заказов"""
+
+    def with_relations(self):
+        """Заказы со связанными фабрикой, страной и сотрудником (для списков и __str__)"""
+        return self.select_related("factory", "factory__country", "employee")
+
+    def for_list(self):
+        """
+        Заказы для списков: со связанными объектами и без комментариев,
+        которые выводятся только на странице заказа.
+        """
+        return self.with_relations().defer("comments", "factory_comments")
+
+    def needing_reminder(self, days=TimeConstants.DEFAULT_REMINDER_FREQUENCY, now=None):
+        """
+        Заказы, по которым нужно напоминание (то же условие, что Order.needs_reminder, но в SQL):
+        загружен и не отправлен или отправлен без инвойса не менее days дней.
+        """
+        cutoff = (now or timezone.now()) - timedelta(days=days)
+        return self.filter(
+            models.Q(status="uploaded", uploaded_at__lte=cutoff)
+            | models.Q(status="sent", sent_at__lte=cutoff)
+        )
+
+
 class Order(models.Model):
     """Модель для заказов"""
 
@@ -126,6 +160,21 @@ class Order(models.Model):
         ("completed", "Завершен"),
         ("cancelled", "Отменен"),
     ]
+    # Названия статусов (get_status_display строит словарь при каждом вызове)
+    STATUS_DISPLAY = dict(STATUS_CHOICES)
+    # Статусы, в которых для турецкой фабрики должен быть выбран ровно один тип фактуры
+    FACTURA_REQUIRED_STATUSES = frozenset({"invoice_received", "completed"})
+    # Ошибки выбора типа фактуры: (factura_export, e_factura_turkey) -> сообщение
+    TURKISH_FACTURA_ERRORS = {
+        (False, False): "Для турецких фабрик необходимо выбрать тип фактуры (Factura Export или E-Factura Turkey).",
+        (True, True): "Можно выбрать только один тип фактуры.",
+    }
+    # Допустимые переходы статуса: новый статус -> (текущий статус, поле времени перехода)
+    STATUS_TRANSITIONS = {
+        "sent": ("uploaded", "sent_at"),
+        "invoice_received": ("sent", "invoice_received_at"),
+        "completed": ("invoice_received", "completed_at"),
+    }
 
     title = models.CharField(max_length=200, verbose_name="Название заказа")
     description = models.TextField(blank=True, verbose_name="Описание")
@@ -133,24 +182,20 @@ class Order(models.Model):
         Factory, on_delete=models.CASCADE, verbose_name="Фабрика"
     )
     employee = models.ForeignKey(
-        User, on_delete=models.CASCADE, verbose_name="Сотрудник"
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="Сотрудник"
     )
 
     # Файлы
     excel_file = models.FileField(
         upload_to="orders/excel/",
-        validators=[
-            FileExtensionValidator(allowed_extensions=["xlsx", "xls"]),
-            validate_excel_file,
-        ],
+        # Расширение проверяется в validate_excel_file вместе с сигнатурой
+        validators=[validate_excel_file],
         verbose_name="Excel файл заказа",
     )
     invoice_file = models.FileField(
         upload_to="orders/invoices/",
-        validators=[
-            FileExtensionValidator(allowed_extensions=["pdf"]),
-            validate_pdf_file,
-        ],
+        # Расширение проверяется в validate_pdf_file вместе с сигнатурой
+        validators=[validate_pdf_file],
         blank=True,
         null=True,
         verbose_name="PDF файл инвойса",
@@ -203,7 +248,7 @@ class Order(models.Model):
         blank=True, verbose_name="Комментарий при отмене клиентом"
     )
     cancelled_by_client_by = models.ForeignKey(
-        User,
+        settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
@@ -217,11 +262,17 @@ class Order(models.Model):
         default=False, verbose_name="E-Factura Turkey"
     )
 
+    objects = OrderQuerySet.as_manager()
+
     @property
     def is_turkish_factory(self):
         """Проверка, является ли фабрика турецкой"""
+        # Проверяем *_id: обращение к незаполненному ForeignKey вызывает исключение,
+        # а фабрика загружается из БД только если она указана
         return (
-            self.factory and self.factory.country and self.factory.country.code == "TR"
+            self.factory_id is not None
+            and self.factory.country_id is not None
+            and self.factory.country.code == "TR"
         )
 
     class Meta:
@@ -247,6 +298,12 @@ class Order(models.Model):
                 fields=["status", "uploaded_at"], name="order_status_upld_idx"
             ),
             models.Index(fields=["employee", "status"], name="order_empl_status_idx"),
+            # Напоминания и просрочки по отправленным заказам (частичный индекс - только status='sent')
+            models.Index(
+                fields=["sent_at"],
+                condition=models.Q(status="sent"),
+                name="order_sent_partial_idx",
+            ),
         ]
 
     def __str__(self):
@@ -254,12 +311,17 @@ class Order(models.Model):
         factory_name = self.factory.name if self.factory else "Без фабрики"
         return f"{self.title} - {factory_name}"
 
-    @property
+    def get_status_display(self):
+        """Название статуса заказа (вызывается в списках на каждую строку)"""
+        return self.STATUS_DISPLAY.get(self.status, self.status)
+
+    # cached_property: в напоминаниях и шаблонах значения читаются по нескольку раз
+    @cached_property
     def days_since_upload(self):
         """Количество дней с момента загрузки"""
         return (timezone.now() - self.uploaded_at).days
 
-    @property
+    @cached_property
     def days_since_sent(self):
         """Количество дней с момента отправки"""
         if self.sent_at:
@@ -269,148 +331,95 @@ class Order(models.Model):
     @property
     def needs_reminder(self):
         """Нужно ли отправить напоминание"""
-        if self.status == "uploaded" and self.days_since_upload >= 7:
+        days = TimeConstants.DEFAULT_REMINDER_FREQUENCY
+        if self.status == "uploaded" and self.days_since_upload >= days:
             return True
         elif (
-            self.status == "sent" and self.days_since_sent and self.days_since_sent >= 7
+            self.status == "sent" and self.days_since_sent and self.days_since_sent >= days
         ):
             return True
         return False
 
-    def mark_as_sent(self):
-        """Отметить заказ как отправленный"""
+    def _transition(self, to_status, **fields):
+        """
+        Перевод заказа в следующий статус по таблице STATUS_TRANSITIONS.
+
+        Проставляет время перехода и дополнительные поля, сохраняет только их.
+        """
         # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ BUG-29: Проверяем валидность перехода статуса
-        if self.status != "uploaded":
+        from_status, timestamp_field = self.STATUS_TRANSITIONS[to_status]
+        if self.status != from_status:
             raise ValueError(
-                f'Нельзя отметить как отправленный заказ со статусом {self.status}. Ожидается статус "uploaded".'
+                f'Нельзя перевести заказ со статусом {self.status} в статус "{to_status}". '
+                f'Ожидается статус "{from_status}".'
             )
-        self.status = "sent"
-        self.sent_at = timezone.now()
-        self.save()
+        self.status = to_status
+        setattr(self, timestamp_field, timezone.now())
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self.save(update_fields=["status", timestamp_field, *fields])
+
+    def mark_as_sent(self):
+        """Отметить заказ как отправленный"""
+        self._transition("sent")
+        self.__dict__.pop("days_since_sent", None)
 
     def mark_invoice_received(self, invoice_file):
         """Отметить получение инвойса"""
-        # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ BUG-29: Проверяем валидность перехода статуса
-        if self.status != "sent":
-            raise ValueError(
-                f'Нельзя отметить получение инвойса для заказа со статусом {self.status}. Ожидается статус "sent".'
-            )
-        self.status = "invoice_received"
-        self.invoice_file = invoice_file
-        self.invoice_received_at = timezone.now()
-        self.save()
+        self._transition("invoice_received", invoice_file=invoice_file)
 
     def mark_as_completed(self):
         """Отметить заказ как завершенный"""
-        # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ BUG-29: Проверяем валидность перехода статуса
-        if self.status != "invoice_received":
-            raise ValueError(
-                f'Нельзя завершить заказ со статусом {self.status}. Ожидается статус "invoice_received".'
-            )
-        self.status = "completed"
-        self.completed_at = timezone.now()
-        self.save()
+        self._transition("completed")
 
     def clean(self) -> None:
         """Валидация модели"""
         super().clean()
 
-        # Валидация имени файла (только если файл загружен)
-        if (
-            self.excel_file
-            and hasattr(self.excel_file, "name")
-            and self.excel_file.name
-        ):
-            validate_safe_filename(self.excel_file.name)
-        if (
-            self.invoice_file
-            and hasattr(self.invoice_file, "name")
-            and self.invoice_file.name
-        ):
-            validate_safe_filename(self.invoice_file.name)
+        # Валидация имени файла - только для новых, еще не сохраненных загрузок:
+        # имя уже сохраненного файла проверено при загрузке и содержит путь upload_to
+        for field_file in (self.excel_file, self.invoice_file):
+            if field_file and not field_file._committed:
+                validate_safe_filename(field_file.name)
+
+        # Ошибки собираются по полям и выбрасываются одним ValidationError
+        errors = {}
 
         # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Валидация полей отмены клиентом
         if self.cancelled_by_client:
             # Если заказ отменен клиентом, должны быть установлены обязательные поля
             if not self.cancelled_by_client_at:
-                from django.core.exceptions import ValidationError
-
-                raise ValidationError(
-                    {
-                        "cancelled_by_client_at": "Дата отмены должна быть установлена, если заказ отменен клиентом."
-                    }
-                )
-            if not self.cancelled_by_client_by:
-                from django.core.exceptions import ValidationError
-
-                raise ValidationError(
-                    {
-                        "cancelled_by_client_by": "Пользователь, отменивший заказ, должен быть указан."
-                    }
-                )
+                errors["cancelled_by_client_at"] = "Дата отмены должна быть установлена, если заказ отменен клиентом."
+            if not self.cancelled_by_client_by_id:
+                errors["cancelled_by_client_by"] = "Пользователь, отменивший заказ, должен быть указан."
             # Проверка длины комментария (максимум 2000 символов)
             if (
                 self.cancelled_by_client_comment
                 and len(self.cancelled_by_client_comment) > 2000
             ):
-                from django.core.exceptions import ValidationError
-
-                raise ValidationError(
-                    {
-                        "cancelled_by_client_comment": "Комментарий не может быть длиннее 2000 символов."
-                    }
-                )
+                errors["cancelled_by_client_comment"] = "Комментарий не может быть длиннее 2000 символов."
         else:
             # Если заказ не отменен, поля отмены должны быть пустыми
             if self.cancelled_by_client_at:
-                from django.core.exceptions import ValidationError
-
-                raise ValidationError(
-                    {
-                        "cancelled_by_client_at": "Дата отмены не может быть установлена, если заказ не отменен клиентом."
-                    }
-                )
-            if self.cancelled_by_client_by:
-                from django.core.exceptions import ValidationError
-
-                raise ValidationError(
-                    {
-                        "cancelled_by_client_by": "Пользователь, отменивший заказ, не может быть указан, если заказ не отменен."
-                    }
-                )
+                errors["cancelled_by_client_at"] = "Дата отмены не может быть установлена, если заказ не отменен клиентом."
+            if self.cancelled_by_client_by_id:
+                errors["cancelled_by_client_by"] = "Пользователь, отменивший заказ, не может быть указан, если заказ не отменен."
 
         # Валидация типа фактуры для турецких фабрик
-        # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Проверяем для статусов 'invoice_received' и 'completed'
-        if self.is_turkish_factory and self.status in ["invoice_received", "completed"]:
-            if not self.factura_export and not self.e_factura_turkey:
-                from django.core.exceptions import ValidationError
-
-                raise ValidationError(
-                    {
-                        "factura_export": "Для турецких фабрик необходимо выбрать тип фактуры (Factura Export или E-Factura Turkey).",
-                        "e_factura_turkey": "Для турецких фабрик необходимо выбрать тип фактуры (Factura Export или E-Factura Turkey).",
-                    }
-                )
-            if self.factura_export and self.e_factura_turkey:
-                from django.core.exceptions import ValidationError
-
-                raise ValidationError(
-                    {
-                        "factura_export": "Можно выбрать только один тип фактуры.",
-                        "e_factura_turkey": "Можно выбрать только один тип фактуры.",
-                    }
-                )
+        factura_types = (bool(self.factura_export), bool(self.e_factura_turkey))
+        factura_error = None
+        if self.is_turkish_factory:
+            # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Проверяем для статусов 'invoice_received' и 'completed'
+            if self.status in self.FACTURA_REQUIRED_STATUSES:
+                factura_error = self.TURKISH_FACTURA_ERRORS.get(factura_types)
         # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Если заказ не турецкий, поля типа фактуры должны быть False
-        elif not self.is_turkish_factory:
-            if self.factura_export or self.e_factura_turkey:
-                from django.core.exceptions import ValidationError
+        elif any(factura_types):
+            factura_error = "Тип фактуры доступен только для турецких фабрик."
+        if factura_error:
+            errors["factura_export"] = errors["e_factura_turkey"] = factura_error
 
-                raise ValidationError(
-                    {
-                        "factura_export": "Тип фактуры доступен только для турецких фабрик.",
-                        "e_factura_turkey": "Тип фактуры доступен только для турецких фабрик.",
-                    }
-                )
+        if errors:
+            raise ValidationError(errors)
 
     def get_absolute_url(self) -> str:
         """URL для детальной страницы заказа"""
@@ -423,7 +432,7 @@ class NotificationSettings(models.Model):
     """Настройки уведомлений для пользователя"""
 
     user = models.OneToOneField(
-        User, on_delete=models.CASCADE, verbose_name="Пользователь"
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="Пользователь"
     )
 
     # Настройки email уведомлений
@@ -464,6 +473,19 @@ class NotificationSettings(models.Model):
         return f"Настройки уведомлений для {self.user.username}"
 
 
+class NotificationQuerySet(models.QuerySet):
+    """QuerySet уведомлений"""
+
+    def with_relations(self):
+        """Уведомления с пользователем и заказом (для списков и __str__)"""
+        return self.select_related("user", "order__factory")
+
+
+# События, которые случаются с заказом один раз: уведомление о них
+# для пользователя может быть только одно (дубликаты отсекает БД)
+NOTIFICATION_SINGLE_EVENT_TYPES = ("order_uploaded", "invoice_received", "order_completed")
+
+
 class Notification(models.Model):
     """Модель для хранения уведомлений"""
 
@@ -475,9 +497,10 @@ class Notification(models.Model):
         ("uploaded_reminder", "Напоминание о неотправленном заказе"),
         ("sent_reminder", "Напоминание о заказе без инвойса"),
     ]
+    SINGLE_EVENT_TYPES = NOTIFICATION_SINGLE_EVENT_TYPES
 
     user = models.ForeignKey(
-        User, on_delete=models.CASCADE, verbose_name="Пользователь"
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="Пользователь"
     )
     order = models.ForeignKey(Order, on_delete=models.CASCADE, verbose_name="Заказ")
     notification_type = models.CharField(
@@ -496,10 +519,27 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
     read_at = models.DateTimeField(blank=True, null=True, verbose_name="Дата прочтения")
 
+    objects = NotificationQuerySet.as_manager()
+
     class Meta:
         verbose_name = "Уведомление"
         verbose_name_plural = "Уведомления"
         ordering = ["-created_at"]
+        indexes = [
+            # Список и счетчик непрочитанных уведомлений пользователя
+            models.Index(
+                fields=["user", "is_read", "-created_at"], name="notif_user_read_idx"
+            ),
+            # Список всех уведомлений пользователя (без фильтра по is_read)
+            models.Index(fields=["user", "-created_at"], name="notif_user_created_idx"),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "order", "notification_type"],
+                condition=models.Q(notification_type__in=NOTIFICATION_SINGLE_EVENT_TYPES),
+                name="notif_unique_per_event",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.title} - {self.user.username}"
@@ -508,13 +548,40 @@ class Notification(models.Model):
         """Отметить уведомление как прочитанное"""
         self.is_read = True
         self.read_at = timezone.now()
-        self.save()
+        self.save(update_fields=["is_read", "read_at"])
 
     def mark_as_sent(self) -> None:
         """Отметить уведомление как отправленное"""
         self.is_sent = True
         self.sent_at = timezone.now()
-        self.save()
+        self.save(update_fields=["is_sent", "sent_at"])
+
+    @classmethod
+    def create_many(cls, notifications, batch_size=1000):
+        """
+        Создание нескольких уведомлений пакетным INSERT вместо create() на каждое.
+
+        bulk_create не отправляет post_save, поэтому кэш счетчиков
+        непрочитанных сбрасывается здесь - один раз на пользователя.
+
+        Args:
+            notifications: Список несохраненных экземпляров Notification
+            batch_size: Размер пакета для bulk_create
+
+        Returns:
+            list: Созданные уведомления (с id)
+        """
+        from .cache_utils import clear_user_cache
+
+        if not notifications:
+            return []
+
+        with transaction.atomic():
+            created = cls.objects.bulk_create(notifications, batch_size=batch_size)
+
+        for user_id in {notification.user_id for notification in created}:
+            clear_user_cache(user_id)
+        return created
 
 
 class NotificationTemplate(models.Model):
@@ -558,16 +625,24 @@ class OrderConfirmation(models.Model):
         ("cancel_order", "Отмена заказа"),
         ("delete_order", "Удаление заказа"),
     ]
+    # Названия действий для __str__ (get_action_display строит словарь при каждом вызове)
+    ACTION_DISPLAY = dict(ACTION_CHOICES)
+    # Сроки подтверждения по операциям (остальные - DEFAULT_EXPIRATION, 1 день)
+    EXPIRATION_DELTAS = {
+        "send_order": timedelta(hours=TimeConstants.CONFIRMATION_EXPIRATION_HOURS_SEND),  # 3 дня для отправки
+        "upload_invoice": timedelta(hours=TimeConstants.CONFIRMATION_EXPIRATION_HOURS_INVOICE),  # 2 дня для инвойса
+    }
+    DEFAULT_EXPIRATION = timedelta(hours=TimeConstants.CONFIRMATION_EXPIRATION_HOURS)
 
     order = models.ForeignKey(Order, on_delete=models.CASCADE, verbose_name="Заказ")
     action = models.CharField(
         max_length=20, choices=ACTION_CHOICES, verbose_name="Действие"
     )
     requested_by = models.ForeignKey(
-        User, on_delete=models.CASCADE, verbose_name="Запросил"
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="Запросил"
     )
     confirmed_by = models.ForeignKey(
-        User,
+        settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
         related_name="confirmed_actions",
         null=True,
@@ -617,41 +692,48 @@ class OrderConfirmation(models.Model):
     def __str__(self):
         # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Безопасный доступ к order.title
         order_title = self.order.title if self.order else "Без заказа"
-        return f"{self.get_action_display()} для заказа {order_title}"
+        action_display = self.ACTION_DISPLAY.get(self.action, self.action)
+        return f"{action_display} для заказа {order_title}"
+
+    @classmethod
+    def default_expires_at(cls, action):
+        """
+        Срок истечения подтверждения для операции, отсчитанный от текущего момента.
+
+        Используется в save(); при bulk_create (save() не вызывается)
+        expires_at нужно заполнить этим методом.
+        """
+        return timezone.now() + cls.EXPIRATION_DELTAS.get(action, cls.DEFAULT_EXPIRATION)
 
     def save(self, *args, **kwargs):
         if not self.expires_at:
-            from datetime import timedelta
-
-            # Разные сроки для разных операций
-            if self.action == "send_order":
-                self.expires_at = timezone.now() + timedelta(
-                    hours=TimeConstants.CONFIRMATION_EXPIRATION_HOURS_SEND
-                )  # 3 дня для отправки
-            elif self.action == "upload_invoice":
-                self.expires_at = timezone.now() + timedelta(
-                    hours=TimeConstants.CONFIRMATION_EXPIRATION_HOURS_INVOICE
-                )  # 2 дня для инвойса
-            elif self.action in ["complete_order", "cancel_order", "delete_order"]:
-                self.expires_at = timezone.now() + timedelta(
-                    hours=TimeConstants.CONFIRMATION_EXPIRATION_HOURS
-                )  # 1 день для критических
-            else:
-                self.expires_at = timezone.now() + timedelta(
-                    hours=TimeConstants.CONFIRMATION_EXPIRATION_HOURS
-                )  # По умолчанию 1 день
+            self.expires_at = self.default_expires_at(self.action)
         super().save(*args, **kwargs)
 
     def is_expired(self):
         """Проверка истечения срока подтверждения"""
         return timezone.now() > self.expires_at
 
+    @classmethod
+    def expire_stale(cls):
+        """
+        Пометить все просроченные ожидающие подтверждения как истекшие одним UPDATE.
+
+        Returns:
+            int: Количество обновленных подтверждений
+        """
+        return cls.objects.filter(
+            status="pending", expires_at__lt=timezone.now()
+        ).update(status="expired")
+
     def can_be_confirmed_by(self, user):
         """Проверка, может ли пользователь подтвердить операцию"""
         # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Подтвердить может либо создатель заказа,
         # либо тот, кто создал подтверждение (requested_by)
         # Это позволяет любому пользователю подтвердить операцию, которую он сам инициировал
-        return self.order.employee == user or self.requested_by == user
+        # Сравниваем по *_id: заказ загружается только если запросил не этот пользователь,
+        # сотрудник и запросивший пользователь не загружаются вовсе
+        return self.requested_by_id == user.pk or self.order.employee_id == user.pk
 
     def confirm(self, user, comments=""):
         """Подтверждение операции"""
@@ -669,12 +751,13 @@ class OrderConfirmation(models.Model):
 
         # Атомарное обновление для предотвращения race condition
         # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Добавляем проверку истечения в фильтр
+        now = timezone.now()
         updated = OrderConfirmation.objects.filter(
-            id=self.id, status="pending", expires_at__gt=timezone.now()
+            id=self.id, status="pending", expires_at__gt=now
         ).update(
             status="confirmed",
             confirmed_by=user,
-            confirmed_at=timezone.now(),
+            confirmed_at=now,
             comments=comments,
         )
 
@@ -688,8 +771,11 @@ class OrderConfirmation(models.Model):
                 raise ValueError("Срок подтверждения истек")
             raise ValueError("Подтверждение уже обработано")
 
-        # Обновляем локальный объект
-        self.refresh_from_db()
+        # Обновляем локальный объект теми же значениями, без повторного SELECT
+        self.status = "confirmed"
+        self.confirmed_by = user
+        self.confirmed_at = now
+        self.comments = comments
 
     def reject(self, user, reason=""):
         """Отклонение операции"""
@@ -707,12 +793,13 @@ class OrderConfirmation(models.Model):
 
         # Атомарное обновление для предотвращения race condition
         # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Добавляем проверку истечения в фильтр
+        now = timezone.now()
         updated = OrderConfirmation.objects.filter(
-            id=self.id, status="pending", expires_at__gt=timezone.now()
+            id=self.id, status="pending", expires_at__gt=now
         ).update(
             status="rejected",
             confirmed_by=user,
-            confirmed_at=timezone.now(),
+            confirmed_at=now,
             rejection_reason=reason,
         )
 
@@ -726,8 +813,11 @@ class OrderConfirmation(models.Model):
                 raise ValueError("Срок подтверждения истек")
             raise ValueError("Подтверждение уже обработано")
 
-        # Обновляем локальный объект
-        self.refresh_from_db()
+        # Обновляем локальный объект теми же значениями, без повторного SELECT
+        self.status = "rejected"
+        self.confirmed_by = user
+        self.confirmed_at = now
+        self.rejection_reason = reason
 
 
 class OrderAuditLog(models.Model):
@@ -744,10 +834,12 @@ class OrderAuditLog(models.Model):
         ("cancelled", "Отменен"),
         ("deleted", "Удален"),
     ]
+    # Названия действий для __str__ (get_action_display строит словарь при каждом вызове)
+    ACTION_DISPLAY = dict(ACTION_TYPES)
 
     order = models.ForeignKey(Order, on_delete=models.CASCADE, verbose_name="Заказ")
     user = models.ForeignKey(
-        User, on_delete=models.CASCADE, verbose_name="Пользователь"
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="Пользователь"
     )
     action = models.CharField(
         max_length=20, choices=ACTION_TYPES, verbose_name="Действие"
@@ -771,12 +863,17 @@ class OrderAuditLog(models.Model):
         verbose_name = "Запись аудита"
         verbose_name_plural = "Журнал аудита"
         ordering = ["-timestamp"]
+        indexes = [
+            # Последние записи аудита заказа (страница деталей заказа)
+            models.Index(fields=["order", "-timestamp"], name="audit_order_ts_idx"),
+        ]
 
     def __str__(self):
         # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Безопасный доступ к order.title
         order_title = self.order.title if self.order else "Без заказа"
         user_name = self.user.username if self.user else "Без пользователя"
-        return f"{self.get_action_display()} заказа {order_title} пользователем {user_name}"
+        action_display = self.ACTION_DISPLAY.get(self.action, self.action)
+        return f"{action_display} заказа {order_title} пользователем {user_name}"
 
     @classmethod
     def log_action(
@@ -791,8 +888,20 @@ class OrderAuditLog(models.Model):
         user_agent="",
         comments="",
     ):
-        """Создание записи в журнале аудита"""
-        return cls.objects.create(
+        """
+        Создание записи в журнале аудита.
+
+        Внутри транзакции запись сохраняется после ее фиксации (transaction.on_commit),
+        чтобы INSERT аудита не удлинял пишущую транзакцию; при откате записи не будет.
+        Вне транзакции запись сохраняется сразу.
+
+        Ошибка сохранения записи только логируется (robust=True): изменение заказа
+        к этому моменту уже зафиксировано и не должно выглядеть как неудачное.
+
+        Returns:
+            OrderAuditLog: Запись аудита (внутри транзакции pk появится только после фиксации)
+        """
+        entry = cls(
             order=order,
             user=user,
             action=action,
@@ -803,6 +912,42 @@ class OrderAuditLog(models.Model):
             user_agent=user_agent,
             comments=comments,
         )
+        transaction.on_commit(entry.save, robust=True)
+        return entry
+
+    @classmethod
+    def log_actions(cls, entries, batch_size=500):
+        """
+        Создание нескольких записей в журнале аудита одним INSERT.
+
+        Как и log_action, внутри транзакции записи сохраняются после ее фиксации,
+        а ошибка сохранения только логируется.
+
+        Args:
+            entries: Список словарей с аргументами как у log_action
+            batch_size: Размер пакета для bulk_create
+
+        Returns:
+            list: Записи аудита (внутри транзакции pk появятся только после фиксации)
+        """
+        objs = [cls(**entry) for entry in entries]
+        if objs:
+            transaction.on_commit(
+                lambda: cls.objects.bulk_create(objs, batch_size=batch_size),
+                robust=True,
+            )
+        return objs
+
+
+@lru_cache(maxsize=128)
+def compile_email_template(source):
+    """
+    Компиляция текста шаблона email в django.template.Template.
+
+    Кэш по тексту шаблона: повторные отправки разбирают шаблон один раз,
+    а после изменения шаблона новый текст просто дает новый ключ.
+    """
+    return Template(source)
 
 
 class EmailTemplate(models.Model):
@@ -885,7 +1030,7 @@ class EmailTemplate(models.Model):
 
     # Аудит
     created_by = models.ForeignKey(
-        User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Создал"
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Создал"
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
     updated_at = models.DateTimeField(auto_now=True, verbose_name="Дата обновления")
@@ -941,20 +1086,18 @@ class EmailTemplate(models.Model):
 
     def render_template(self, context):
         """Рендеринг шаблона с переданным контекстом"""
-        from django.template import Template, Context
-        from django.template.loader import render_to_string
-
         try:
+            # Один контекст на все три части письма
+            template_context = Context(context)
+
             # Рендерим HTML версию
-            html_template = Template(self.html_content)
-            html_rendered = html_template.render(Context(context))
+            html_rendered = compile_email_template(self.html_content).render(template_context)
 
             # Рендерим текстовую версию
-            text_template = Template(self.text_content)
-            text_rendered = text_template.render(Context(context))
+            text_rendered = compile_email_template(self.text_content).render(template_context)
 
             return {
-                "subject": Template(self.subject).render(Context(context)),
+                "subject": compile_email_template(self.subject).render(template_context),
                 "html_content": html_rendered,
                 "text_content": text_rendered,
             }
@@ -994,7 +1137,7 @@ class EmailTemplateVersion(models.Model):
     # Метаданные версии
     change_description = models.TextField(blank=True, verbose_name="Описание изменений")
     created_by = models.ForeignKey(
-        User, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Создал"
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, verbose_name="Создал"
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
 
@@ -1028,6 +1171,8 @@ class Invoice(models.Model):
         ("paid", "Полностью оплачен"),
         ("overdue", "Просрочен"),
     ]
+    # Названия статусов оплаты (get_status_display строит словарь при каждом вызове)
+    PAYMENT_STATUS_DISPLAY = dict(PAYMENT_STATUS_CHOICES)
 
     order = models.OneToOneField(
         Order, on_delete=models.CASCADE, verbose_name="Заказ", related_name="invoice"
@@ -1105,9 +1250,12 @@ class Invoice(models.Model):
         order_title = self.order.title if self.order else "Без заказа"
         return f"Инвойс {self.invoice_number} для заказа {order_title}"
 
+    def get_status_display(self):
+        """Название статуса оплаты инвойса"""
+        return self.PAYMENT_STATUS_DISPLAY.get(self.status, self.status)
+
     def clean(self):
         """Валидация модели Invoice"""
-        from django.core.exceptions import ValidationError
         from django.utils import timezone
 
         super().clean()
@@ -1314,7 +1462,7 @@ class InvoicePayment(models.Model):
 
     # Метаданные
     created_by = models.ForeignKey(
-        User, on_delete=models.CASCADE, verbose_name="Создал"
+        settings.AUTH_USER_MODEL, on_delete=models.CASCADE, verbose_name="Создал"
     )
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата создания")
 
@@ -1413,7 +1561,7 @@ class OrderCBM(models.Model):
         help_text="Дополнительная информация о CBM",
     )
     created_by = models.ForeignKey(
-        User,
+        settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
@@ -1487,7 +1635,7 @@ class Shipment(models.Model):
         help_text="Дополнительная информация о фуре",
     )
     created_by = models.ForeignKey(
-        User,
+        settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
@@ -1505,7 +1653,9 @@ class Shipment(models.Model):
     def __str__(self):
         return f"Фура {self.shipment_number}"
 
-    @property
+    # cached_property: в списках фур значение читается по нескольку раз на строку
+    # (cbm_difference, cbm_difference_percentage)
+    @cached_property
     def total_invoice_cbm(self):
         """
         Сумма всех кубов из инвойсов заказов в этой фуре.
@@ -1513,15 +1663,10 @@ class Shipment(models.Model):
         from django.db.models import Sum
         from decimal import Decimal
 
-        total = Decimal("0")
-        for order in self.orders.all():
-            # Суммируем все CBM записи заказа
-            order_cbm = order.cbm_records.aggregate(total=Sum("cbm_value"))[
-                "total"
-            ] or Decimal("0")
-            total += order_cbm
-
-        return total
+        # Один агрегирующий запрос по всем заказам фуры вместо запроса на каждый заказ
+        return self.orders.aggregate(total=Sum("cbm_records__cbm_value"))[
+            "total"
+        ] or Decimal("0")
 
     @property
     def cbm_difference(self):
@@ -1584,7 +1729,7 @@ class EFacturaBasket(models.Model):
         verbose_name="Дата корзины", help_text="Дата, связанная с корзиной"
     )
     created_by = models.ForeignKey(
-        User,
+        settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
@@ -1626,9 +1771,7 @@ class EFacturaBasket(models.Model):
         Returns:
             tuple: (EFacturaBasket, created)
         """
-        from datetime import date
         from calendar import month_name
-        from django.core.exceptions import ValidationError
 
         # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Валидация параметров
         if not isinstance(month, int) or month < 1 or month > 12:
@@ -1712,7 +1855,7 @@ class EFacturaFile(models.Model):
         verbose_name="Дата загрузки", help_text="Дата загрузки файла"
     )
     created_by = models.ForeignKey(
-        User,
+        settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
@@ -1767,8 +1910,6 @@ class EFacturaFile(models.Model):
         """
         Автоматическое распределение файла по корзине на основе даты загрузки.
         """
-        from datetime import date
-
         # Если дата загрузки не указана, используем текущую дату
         if not self.upload_date:
             self.upload_date = date.today()
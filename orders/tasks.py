@@ -1,12 +1,12 @@
 from celery import shared_task
-from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.core.mail import EmailMessage, EmailMultiAlternatives, send_mail
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
 from django.utils.html import escape
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import IntegrityError, transaction
 from datetime import timedelta
 from email.header import Header
 import time
@@ -14,10 +14,11 @@ import threading
 from .models import (
     Order,
     Notification,
-    NotificationSettings,
     NotificationTemplate,
     Invoice,
+    OrderConfirmation,
 )
+from .cache_utils import get_notification_settings, get_notification_template
 from .constants import TimeConstants
 
 # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Rate limiting для отправки email
@@ -44,45 +45,30 @@ def send_notification_email(self, notification_id):
                 f"User {user.username} has no email address. Cannot send notification."
             )
 
-        # Проверяем настройки пользователя
-        try:
-            settings_obj = NotificationSettings.objects.get(user=user)
-            if not settings_obj.email_notifications:
-                return f"Email notifications disabled for user {user.username}"
-        except NotificationSettings.DoesNotExist:
-            # Если настройки не найдены, создаем их с настройками по умолчанию
-            settings_obj = NotificationSettings.objects.create(user=user)
+        # Проверяем настройки пользователя (если их нет - создаются по умолчанию)
+        settings_obj = get_notification_settings(user)
+        if not settings_obj.email_notifications:
+            return f"Email notifications disabled for user {user.username}"
 
         # Получаем шаблон уведомления
         html_message = None
         text_message = None
         try:
-            template = NotificationTemplate.objects.get(
-                template_type=notification.notification_type, is_active=True
-            )
+            template = get_notification_template(notification.notification_type)
             subject = template.subject
+            # Файловые шаблоны компилируются один раз: Django кэширует их загрузчиком
+            # (django.template.loaders.cached.Loader включен по умолчанию)
+            context = {
+                "notification": notification,
+                "order": notification.order,
+                "user": user,
+                "template": template,
+                "base_url": settings.BASE_URL,
+            }
             # Рендерим HTML шаблон
-            html_message = render_to_string(
-                "emails/notification.html",
-                {
-                    "notification": notification,
-                    "order": notification.order,
-                    "user": user,
-                    "template": template,
-                    "base_url": settings.BASE_URL,
-                },
-            )
+            html_message = render_to_string("emails/notification.html", context)
             # Рендерим текстовый шаблон
-            text_message = render_to_string(
-                "emails/notification.txt",
-                {
-                    "notification": notification,
-                    "order": notification.order,
-                    "user": user,
-                    "template": template,
-                    "base_url": settings.BASE_URL,
-                },
-            )
+            text_message = render_to_string("emails/notification.txt", context)
         except NotificationTemplate.DoesNotExist:
             # Если шаблон не найден, используем базовый шаблон
             subject = notification.title
@@ -189,20 +175,12 @@ def check_overdue_orders(self):
     try:
         now = timezone.now()
         notifications_sent = 0
+        new_notifications = []
 
         # Получаем все заказы, которые нуждаются в напоминаниях
         # Используем настройки пользователя для определения периода
-        overdue_orders = Order.objects.filter(
-            models.Q(
-                status="uploaded",
-                uploaded_at__lte=now
-                - timedelta(days=TimeConstants.MIN_REMINDER_DAYS),  # Минимум 1 день
-            )
-            | models.Q(
-                status="sent",
-                sent_at__lte=now
-                - timedelta(days=TimeConstants.MIN_REMINDER_DAYS),  # Минимум 1 день
-            )
+        overdue_orders = Order.objects.needing_reminder(
+            days=TimeConstants.MIN_REMINDER_DAYS, now=now  # Минимум 1 день
         ).select_related("employee", "factory")
 
         for order in overdue_orders:
@@ -215,9 +193,8 @@ def check_overdue_orders(self):
                 continue
 
             # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ BUG-23: Используем get_or_create() для предотвращения race condition
-            settings_obj, created = NotificationSettings.objects.get_or_create(
-                user=order.employee
-            )
+            # (внутри get_notification_settings; настройки сотрудника с несколькими заказами берутся из кэша)
+            settings_obj = get_notification_settings(order.employee)
 
             if not settings_obj.email_notifications:
                 continue
@@ -247,16 +224,19 @@ def check_overdue_orders(self):
             if last_reminder:
                 continue
 
-            # Создаем уведомление
-            notification = Notification.objects.create(
-                user=order.employee,
-                order=order,
-                notification_type=notification_type,
-                title=title,
-                message=message,
+            # Уведомления создаются одним пакетом после цикла
+            new_notifications.append(
+                Notification(
+                    user=order.employee,
+                    order=order,
+                    notification_type=notification_type,
+                    title=title,
+                    message=message,
+                )
             )
 
-            # Отправляем email асинхронно
+        # Отправляем email асинхронно
+        for notification in Notification.create_many(new_notifications):
             send_notification_email.delay(notification.id)
             notifications_sent += 1
 
@@ -298,13 +278,10 @@ def send_order_notification(self, order_id, notification_type):
                 f"User {user.username} has no email address. Cannot send notification."
             )
 
-        # Проверяем настройки пользователя
-        try:
-            settings_obj = NotificationSettings.objects.get(user=user)
-            if not settings_obj.email_notifications:
-                return f"Email notifications disabled for user {user.username}"
-        except NotificationSettings.DoesNotExist:
-            settings_obj = NotificationSettings.objects.create(user=user)
+        # Проверяем настройки пользователя (если их нет - создаются по умолчанию)
+        settings_obj = get_notification_settings(user)
+        if not settings_obj.email_notifications:
+            return f"Email notifications disabled for user {user.username}"
 
         # Определяем заголовок и сообщение в зависимости от типа
         # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Безопасный доступ к factory.name
@@ -333,14 +310,23 @@ def send_order_notification(self, order_id, notification_type):
         else:
             return f"Unknown notification type: {notification_type}"
 
-        # Создаем уведомление
-        notification = Notification.objects.create(
-            user=user,
-            order=order,
-            notification_type=notification_type,
-            title=title,
-            message=message,
-        )
+        # Создаем уведомление без предварительной проверки: повтор разового события
+        # (например, retry задачи) отсекает ограничение notif_unique_per_event
+        try:
+            with transaction.atomic():
+                notification = Notification.objects.create(
+                    user=user,
+                    order=order,
+                    notification_type=notification_type,
+                    title=title,
+                    message=message,
+                )
+        except IntegrityError:
+            notification = Notification.objects.get(
+                user=user, order=order, notification_type=notification_type
+            )
+            if notification.is_sent:
+                return f"Notification {notification_type} for order {order.title} already sent"
 
         # Отправляем email асинхронно
         send_notification_email.delay(notification.id)
@@ -473,11 +459,31 @@ def cleanup_old_notifications():
     return f"Deleted {count} old notifications"
 
 
+@shared_task
+def expire_stale_confirmations():
+    """Пометка просроченных подтверждений операций как истекших"""
+    count = OrderConfirmation.expire_stale()
+    return f"Expired {count} confirmations"
+
+
+@shared_task
+def send_test_email(recipient, subject, message, from_email):
+    """Отправка тестового письма (management команда check_email_settings)"""
+    send_mail(
+        subject=subject,
+        message=message,
+        from_email=from_email,
+        recipient_list=[recipient],
+        fail_silently=False,
+    )
+
+    return f"Test email sent to {recipient}"
+
+
 @shared_task
 def generate_system_statistics():
     """Генерация ежедневной статистики системы"""
     from django.contrib.auth.models import User
-    from django.db.models import Count, Q
     from datetime import timedelta
 
     now = timezone.now()
@@ -493,15 +499,8 @@ def generate_system_statistics():
         "completed_orders": Order.objects.filter(
             completed_at__date=yesterday.date()
         ).count(),
-        "overdue_orders": Order.objects.filter(
-            Q(
-                status="uploaded",
-                uploaded_at__lte=now - timedelta(days=TimeConstants.LOG_RETENTION_DAYS),
-            )
-            | Q(
-                status="sent",
-                sent_at__lte=now - timedelta(days=TimeConstants.LOG_RETENTION_DAYS),
-            )
+        "overdue_orders": Order.objects.needing_reminder(
+            days=TimeConstants.LOG_RETENTION_DAYS, now=now
         ).count(),
         "active_users": User.objects.filter(last_login__date=yesterday.date()).count(),
         "notifications_sent": Notification.objects.filter(
@@ -523,6 +522,7 @@ def check_overdue_payments():
     """Проверка просроченных платежей и отправка уведомлений"""
     now = timezone.now()
     notifications_sent = 0
+    new_notifications = []
 
     # Получаем все просроченные инвойсы
     overdue_invoices = Invoice.objects.filter(
@@ -532,13 +532,10 @@ def check_overdue_payments():
     for invoice in overdue_invoices:
         user = invoice.order.employee
 
-        # Проверяем настройки пользователя
-        try:
-            settings_obj = NotificationSettings.objects.get(user=user)
-            if not settings_obj.email_notifications:
-                continue
-        except NotificationSettings.DoesNotExist:
-            settings_obj = NotificationSettings.objects.create(user=user)
+        # Проверяем настройки пользователя (если их нет - создаются по умолчанию)
+        settings_obj = get_notification_settings(user)
+        if not settings_obj.email_notifications:
+            continue
 
         # Проверяем, не отправляли ли мы уже напоминание недавно
         last_reminder = Notification.objects.filter(
@@ -556,15 +553,18 @@ def check_overdue_payments():
         title = f"Overdue payment: Invoice {invoice.invoice_number}"
         message = f"Invoice {invoice.invoice_number} for order '{invoice.order.title}' is overdue by {days_overdue} days. Remaining amount: {invoice.remaining_amount}€"
 
-        notification = Notification.objects.create(
-            user=user,
-            order=invoice.order,
-            notification_type="payment_overdue",
-            title=title,
-            message=message,
+        new_notifications.append(
+            Notification(
+                user=user,
+                order=invoice.order,
+                notification_type="payment_overdue",
+                title=title,
+                message=message,
+            )
         )
 
-        # Отправляем email асинхронно
+    # Отправляем email асинхронно
+    for notification in Notification.create_many(new_notifications):
         send_notification_email.delay(notification.id)
         notifications_sent += 1
 
@@ -603,7 +603,7 @@ def check_missing_invoices_for_factories(self):
             invoice_file__isnull=True,
             cancelled_by_client=False,
             factory__is_active=True,  # BUG-77: Только активные фабрики
-        ).select_related('factory', 'factory__country', 'employee').annotate(
+        ).with_relations().annotate(
             has_invoice=Exists(invoice_exists)
         ).filter(has_invoice=False)
         
@@ -654,8 +654,6 @@ def check_missing_invoices_for_factories(self):
             
             # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ BUG-79 и BUG-80: Используем транзакцию и повторную проверку Invoice
             # для предотвращения race condition и дублирования напоминаний
-            from django.db import transaction
-            
             try:
                 with transaction.atomic():
                     # Блокируем заказ для обновления и повторно проверяем все условия
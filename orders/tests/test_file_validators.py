@@ -7,7 +7,8 @@ from orders.validators import (
     validate_file_size, 
     validate_excel_file, 
     validate_pdf_file,
-    validate_safe_filename
+    validate_safe_filename,
+    read_file_header
 )
 
 
@@ -241,6 +242,15 @@ startxref
         
         self.assertIn('Файл не является корректным PDF файлом', str(context.exception))
 
+    def test_read_file_header_restores_position(self):
+        """Тест чтения заголовка файла - позиция файла не меняется"""
+        self.valid_pdf_file.seek(3)
+        
+        header = read_file_header(self.valid_pdf_file)
+        
+        self.assertTrue(header.startswith(b'%PDF'))
+        self.assertEqual(self.valid_pdf_file.tell(), 3)
+
     def test_validate_safe_filename_valid(self):
         """Тест валидации безопасного имени файла - валидные имена"""
         valid_names = [
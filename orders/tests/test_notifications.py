@@ -1,9 +1,11 @@
 from django.test import TestCase, Client
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from django.urls import reverse
 from django.utils import timezone
 from datetime import timedelta
 from orders.models import Order, Country, Factory, Notification, NotificationSettings, NotificationTemplate
+from orders.cache_utils import get_notification_template
 from orders.tasks import send_notification_email, check_overdue_orders, send_order_notification
 
 
@@ -88,6 +90,60 @@ class NotificationTestCase(TestCase):
         self.assertTrue(notification.is_sent)
         self.assertIsNotNone(notification.sent_at)
     
+    def test_notification_create_many(self):
+        """Тест пакетного создания уведомлений"""
+        other_user = User.objects.create_user(
+            username='otheruser',
+            email='other@example.com',
+            password='testpass123'
+        )
+        
+        created = Notification.create_many([
+            Notification(
+                user=user,
+                order=self.order,
+                notification_type='order_uploaded',
+                title='Test Notification',
+                message='Test message'
+            )
+            for user in (self.user, other_user)
+        ])
+        
+        self.assertEqual(len(created), 2)
+        self.assertTrue(all(notification.pk for notification in created))
+        self.assertEqual(Notification.objects.filter(order=self.order).count(), 2)
+        self.assertEqual(Notification.create_many([]), [])
+    
+    def test_single_event_notification_is_unique(self):
+        """Тест: уведомление о разовом событии заказа не дублируется"""
+        Notification.objects.create(
+            user=self.user,
+            order=self.order,
+            notification_type='order_uploaded',
+            title='Test Notification',
+            message='Test message'
+        )
+        
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notification.objects.create(
+                user=self.user,
+                order=self.order,
+                notification_type='order_uploaded',
+                title='Test Notification',
+                message='Test message'
+            )
+        
+        # Напоминания могут повторяться
+        for i in range(2):
+            Notification.objects.create(
+                user=self.user,
+                order=self.order,
+                notification_type='uploaded_reminder',
+                title=f'Reminder {i}',
+                message='Test message'
+            )
+        self.assertEqual(Notification.objects.filter(order=self.order).count(), 3)
+    
     def test_notification_settings_creation(self):
         """Тест создания настроек уведомлений"""
         # Удаляем существующие настройки
@@ -115,6 +171,23 @@ class NotificationTestCase(TestCase):
         self.assertEqual(template.subject, 'Test Subject')
         self.assertTrue(template.is_active)
     
+    def test_notification_template_cache_cleared_on_type_change(self):
+        """Тест: после смены типа шаблон не отдается из кэша под старым типом"""
+        template = NotificationTemplate.objects.create(
+            template_type='sent_reminder',
+            subject='Test Subject',
+            html_template='<h1>Test HTML</h1>',
+            text_template='Test Text'
+        )
+        self.assertEqual(get_notification_template('sent_reminder').pk, template.pk)
+        
+        template.template_type = 'order_sent'
+        template.save()
+        
+        with self.assertRaises(NotificationTemplate.DoesNotExist):
+            get_notification_template('sent_reminder')
+        self.assertEqual(get_notification_template('order_sent').pk, template.pk)
+    
     def test_notification_list_view(self):
         """Тест view списка уведомлений"""
         # Создаем уведомление
@@ -169,7 +242,7 @@ class NotificationTestCase(TestCase):
             Notification.objects.create(
                 user=self.user,
                 order=self.order,
-                notification_type='order_uploaded',
+                notification_type='order_sent',
                 title=f'Test Notification {i}',
                 message=f'Test message {i}'
             )
@@ -353,7 +426,7 @@ class NotificationTestCase(TestCase):
             Notification.objects.create(
                 user=self.user,
                 order=self.order,
-                notification_type='order_uploaded',
+                notification_type='order_sent',
                 title=f'Test Notification {i}',
                 message=f'Test message {i}',
                 is_read=(i < 3)  # Первые 3 прочитаны
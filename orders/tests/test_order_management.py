@@ -2,10 +2,11 @@ import pytest
 from django.test import TestCase, Client, RequestFactory
 from django.urls import reverse
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
 from datetime import timedelta
-from orders.models import Country, Factory, Order, OrderConfirmation, Invoice, InvoicePayment
+from orders.models import Country, Factory, Order, OrderConfirmation, Invoice, InvoicePayment, EmailTemplate, compile_email_template
 from orders.views.order_views import OrderListView, OrderDetailView, create_order
 from orders.views.confirmation_views import send_order, upload_invoice_form, upload_invoice_execute
 from orders.forms import OrderForm, InvoiceWithPaymentForm
@@ -407,6 +408,66 @@ startxref
         # Проверяем напоминание для отправленного заказа
         self.assertTrue(order.needs_reminder)
 
+    def test_clean_skips_saved_file_names(self):
+        """Тест: имя уже сохраненного файла (с путем upload_to) не проверяется повторно"""
+        order = Order.objects.create(
+            title='Заказ',
+            factory=self.factory_obj,
+            employee=self.user,
+            excel_file=self.excel_file,
+        )
+        order = Order.objects.get(pk=order.pk)
+        self.assertIn('/', order.excel_file.name)
+        order.clean()
+        
+        order.excel_file = SimpleUploadedFile('bad:name.xlsx', b'PK\x03\x04')
+        with self.assertRaises(ValidationError):
+            order.clean()
+
+    def test_email_template_render_reuses_compiled_templates(self):
+        """Тест: повторный рендеринг шаблона email не компилирует его заново"""
+        template = EmailTemplate(
+            subject='Заказ {{ order_title }}',
+            html_content='<p>{{ order_title }}</p>',
+            text_content='Заказ: {{ order_title }}',
+        )
+        
+        rendered = template.render_template({'order_title': 'A-1'})
+        self.assertEqual(rendered['subject'], 'Заказ A-1')
+        self.assertEqual(rendered['html_content'], '<p>A-1</p>')
+        self.assertEqual(rendered['text_content'], 'Заказ: A-1')
+        
+        hits = compile_email_template.cache_info().hits
+        rendered = template.render_template({'order_title': 'B-2'})
+        self.assertEqual(rendered['subject'], 'Заказ B-2')
+        self.assertEqual(compile_email_template.cache_info().hits, hits + 3)
+
+    def test_needing_reminder_queryset(self):
+        """Тест выборки заказов, нуждающихся в напоминании"""
+        old_order = Order.objects.create(
+            title='Старый заказ',
+            factory=self.factory_obj,
+            employee=self.user,
+            excel_file=self.excel_file,
+        )
+        new_order = Order.objects.create(
+            title='Новый заказ',
+            factory=self.factory_obj,
+            employee=self.user,
+            excel_file=self.excel_file,
+        )
+        # uploaded_at с auto_now_add - сдвигаем дату через update()
+        Order.objects.filter(pk=old_order.pk).update(
+            uploaded_at=timezone.now() - timedelta(days=8)
+        )
+        
+        reminder_ids = set(Order.objects.needing_reminder().values_list('id', flat=True))
+        self.assertIn(old_order.pk, reminder_ids)
+        self.assertNotIn(new_order.pk, reminder_ids)
+        
+        old_order.refresh_from_db()
+        self.assertTrue(old_order.needs_reminder)
+
     def test_order_access_permissions(self):
         """Тест прав доступа к заказам"""
         # Создаем другого пользователя
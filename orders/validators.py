@@ -1,4 +1,5 @@
 import os
+import re
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from .constants import FileConstants
@@ -6,13 +7,49 @@ from .constants import FileConstants
 # ВАЖНО: magic больше не используется, т.к. может вызывать зависания
 # Используем только проверку сигнатур файлов для надежности
 
+# Запрещенные последовательности в имени файла: '..' и символы / \ : * ? " < > |
+# Компилируется один раз при импорте - один проход по имени вместо цикла проверок
+DANGEROUS_FILENAME_RE = re.compile(r'\.\.|[/\\:*?"<>|]')
+
+
+# Сигнатуры файлов (magic bytes)
+EXCEL_SIGNATURES = (
+    b'PK\x03\x04',  # ZIP/Office signature (.xlsx)
+    b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1',  # OLE signature (.xls)
+)
+PDF_SIGNATURE = b'%PDF'
+
+# Длины самой длинной сигнатуры достаточно для проверки любого типа
+FILE_HEADER_SIZE = 8
+
+
+def read_file_header(file, size=FILE_HEADER_SIZE):
+    """
+    Прочитать первые байты файла для проверки сигнатуры.
+    
+    Читает только заголовок (не весь файл) и возвращает указатель
+    на исходную позицию, чтобы следующие чтения файла не сломались.
+    """
+    try:
+        # Сохраняем текущую позицию файла
+        current_pos = file.tell()
+        file.seek(0)
+        header = file.read(size)
+        # Возвращаем позицию файла
+        file.seek(current_pos)
+    except Exception as e:
+        # Если не удалось прочитать файл, это может быть проблема с доступом к файлу
+        raise ValidationError(
+            _('Ошибка при чтении файла: {}').format(str(e)),
+            code='file_read_error'
+        )
+    return header
+
 
 def validate_file_type(file):
     """Валидация типа файла по содержимому"""
-    # Читаем первые 1024 байта для определения MIME типа
-    file.seek(0)
-    file_content = file.read(1024)
-    file.seek(0)  # Возвращаем указатель в начало
+    # Для проверки сигнатур достаточно заголовка файла
+    file_content = read_file_header(file)
     
     # ВАЖНО: magic.from_buffer() может зависать даже на маленьких файлах
     # Используем только проверку сигнатур для надежности и скорости
@@ -29,8 +66,7 @@ def validate_file_type(file):
     # Проверка для Excel файлов
     if is_excel_extension:
         # Проверяем сигнатуры Excel файлов (приоритет сигнатурам, они быстрее)
-        if (file_content.startswith(b'PK\x03\x04') or  # ZIP/Office signature (.xlsx)
-            file_content.startswith(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1')):  # OLE signature (.xls)
+        if file_content.startswith(EXCEL_SIGNATURES):
             return
         # Если сигнатуры не подошли, проверяем MIME тип
         if mime_type and mime_type in ['application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
@@ -42,7 +78,7 @@ def validate_file_type(file):
     # Проверка для PDF файлов
     if is_pdf_extension:
         # Проверяем сигнатуру PDF (приоритет сигнатуре)
-        if file_content.startswith(b'%PDF'):
+        if file_content.startswith(PDF_SIGNATURE):
             return
         # Если сигнатура не подошла, проверяем MIME тип
         if mime_type == 'application/pdf':
@@ -112,32 +148,13 @@ def validate_excel_file(file):
     
     # Проверка типа файла по содержимому
     # ВАЖНО: Используем только проверку сигнатур, без magic (предотвращает зависания)
-    try:
-        # Сохраняем текущую позицию файла
-        current_pos = file.tell()
-        file.seek(0)
-        
-        # Читаем только первые 8 байт для проверки сигнатур (достаточно для Excel)
-        file_content = file.read(8)
-        
-        # Возвращаем позицию файла
-        file.seek(current_pos)
-        
-        # Проверяем сигнатуры Excel файлов
-        if not (file_content.startswith(b'PK\x03\x04') or  # ZIP/Office signature (.xlsx)
-                file_content.startswith(b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1')):  # OLE signature (.xls)
-            raise ValidationError(
-                _('Файл не является корректным Excel файлом'),
-                code='invalid_excel_file'
-            )
-    except ValidationError:
-        # Пробрасываем ValidationError как есть
-        raise
-    except Exception as e:
-        # Если не удалось прочитать файл, это может быть проблема с доступом к файлу
+    file_content = read_file_header(file)
+    
+    # Проверяем сигнатуры Excel файлов
+    if not file_content.startswith(EXCEL_SIGNATURES):
         raise ValidationError(
-            _('Ошибка при чтении файла: {}').format(str(e)),
-            code='file_read_error'
+            _('Файл не является корректным Excel файлом'),
+            code='invalid_excel_file'
         )
 
 
@@ -168,45 +185,25 @@ def validate_pdf_file(file):
     
     # Проверка типа файла по содержимому
     # ВАЖНО: Используем только проверку сигнатур, без magic (предотвращает зависания)
-    try:
-        # Сохраняем текущую позицию файла
-        current_pos = file.tell()
-        file.seek(0)
-        
-        # Читаем только первые 4 байта для проверки сигнатуры PDF
-        file_content = file.read(4)
-        
-        # Возвращаем позицию файла
-        file.seek(current_pos)
-        
-        # Проверяем сигнатуру PDF файла
-        if not file_content.startswith(b'%PDF'):
-            raise ValidationError(
-                _('Файл не является корректным PDF файлом'),
-                code='invalid_pdf_file'
-            )
-    except ValidationError:
-        # Пробрасываем ValidationError как есть
-        raise
-    except Exception as e:
-        # Если не удалось прочитать файл, это может быть проблема с доступом к файлу
+    file_content = read_file_header(file)
+    
+    # Проверяем сигнатуру PDF файла
+    if not file_content.startswith(PDF_SIGNATURE):
         raise ValidationError(
-            _('Ошибка при чтении файла: {}').format(str(e)),
-            code='file_read_error'
+            _('Файл не является корректным PDF файлом'),
+            code='invalid_pdf_file'
         )
 
 
 def validate_safe_filename(filename):
     """Валидация имени файла на безопасность"""
     # Запрещенные символы
-    dangerous_chars = ['..', '/', '\\', ':', '*', '?', '"', '<', '>', '|']
-    
-    for char in dangerous_chars:
-        if char in filename:
-            raise ValidationError(
-                _('Имя файла содержит недопустимые символы: {}').format(char),
-                code='dangerous_filename'
-            )
+    match = DANGEROUS_FILENAME_RE.search(filename)
+    if match:
+        raise ValidationError(
+            _('Имя файла содержит недопустимые символы: {}').format(match.group()),
+            code='dangerous_filename'
+        )
     
     # Проверка длины
     if len(filename) > 255:
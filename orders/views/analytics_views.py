@@ -19,6 +19,7 @@ import csv
 
 from ..models import Order, Factory, Country, OrderCBM
 from ..analytics import get_analytics_data
+from ..cache_utils import get_public_statistics_cache_key
 from django.db.models import Sum, Count, Q
 from django.utils import timezone
 from datetime import timedelta, datetime
@@ -88,7 +89,7 @@ class AnalyticsDashboardView(TemplateView):
         """
         # Cache public statistics for 10 minutes
         from django.core.cache import cache
-        cache_key = "public_statistics"
+        cache_key = get_public_statistics_cache_key()
         cached_stats = cache.get(cache_key)
         
         if cached_stats is None:
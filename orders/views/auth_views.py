@@ -20,6 +20,7 @@ from datetime import timedelta
 
 from ..models import Order, Factory, Country
 from ..constants import TimeConstants
+from ..cache_utils import get_public_statistics_cache_key
 from django.contrib.auth.models import User
 
 
@@ -108,7 +109,7 @@ class HomeView(TemplateView):
         """
         # КРИТИЧЕСКОЕ ИСПРАВЛЕНИЕ: Уменьшено время кэширования до 1 минуты для более актуальных данных
         # Данные теперь обновляются каждую минуту вместо 10 минут
-        cache_key = "public_statistics"
+        cache_key = get_public_statistics_cache_key()
         cached_stats = cache.get(cache_key)
         
         if cached_stats is None:
@@ -162,14 +163,14 @@ class HomeView(TemplateView):
         recent_orders = user_orders.filter(uploaded_at__gte=week_ago).count()
         
         # Get recent orders for display
-        recent_orders_list = user_orders.select_related('factory', 'factory__country', 'employee').order_by('-uploaded_at')[:5]
+        recent_orders_list = user_orders.for_list().order_by('-uploaded_at')[:5]
         
         # Get urgent orders (uploaded more than 3 days ago and still not sent)
         three_days_ago = now - timedelta(days=TimeConstants.STATS_DAYS)
         urgent_orders_list = user_orders.filter(
             status='uploaded',
             uploaded_at__lt=three_days_ago
-        ).select_related('factory', 'factory__country', 'employee').order_by('uploaded_at')[:5]
+        ).for_list().order_by('uploaded_at')[:5]
         
         # Count overdue orders
         overdue_orders_count = urgent_orders_list.count()
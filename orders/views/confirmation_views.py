@@ -67,7 +67,10 @@ class ConfirmationListView(ListView):
         from django.db.models import Q
         queryset = OrderConfirmation.objects.filter(
             Q(order__employee=self.request.user) | Q(requested_by=self.request.user)
-        ).select_related('order', 'requested_by', 'confirmed_by').order_by('-requested_at')
+        ).select_related('order', 'requested_by', 'confirmed_by').defer(
+            # JSON с данными подтверждения в списке не выводится - не загружаем и не разбираем его
+            'confirmation_data'
+        ).order_by('-requested_at')
         
         # Apply status filter
         status_filter = self.request.GET.get('status')
@@ -30,7 +30,10 @@ class EmailTemplateListView(ListView):
     
     def get_queryset(self):
         """Get filtered templates based on search parameters"""
-        queryset = EmailTemplate.objects.all()
+        # Тексты шаблонов в списке не выводятся - загружаем только на странице шаблона
+        queryset = EmailTemplate.objects.select_related('created_by').defer(
+            'html_content', 'text_content', 'variables_help'
+        )
         
         # Get search parameters
         search = self.request.GET.get('search', '')
@@ -16,8 +16,9 @@ from django.utils.decorators import method_decorator
 from django.views.generic import ListView
 from django.http import JsonResponse
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Count, Q
 
+from ..cache_utils import clear_user_cache
 from ..models import Notification, NotificationSettings, Order
 from ..forms import NotificationSettingsForm, NotificationFilterForm
 from ..tasks import send_order_notification
@@ -40,7 +41,7 @@ class NotificationListView(ListView):
     
     def get_queryset(self):
         """Get notifications for the current user."""
-        queryset = Notification.objects.filter(user=self.request.user).order_by('-created_at')
+        queryset = Notification.objects.filter(user=self.request.user).with_relations().order_by('-created_at')
         
         # Apply filters
         status_filter = self.request.GET.get('status')
@@ -79,14 +80,13 @@ class NotificationListView(ListView):
         context['type_filter'] = self.request.GET.get('notification_type', '')
         context['search_query'] = self.request.GET.get('search', '')
         
-        # Add counts
-        context['unread_count'] = Notification.objects.filter(
-            user=self.request.user, 
-            is_read=False
-        ).count()
-        context['total_count'] = Notification.objects.filter(
-            user=self.request.user
-        ).count()
+        # Add counts (оба счетчика одним запросом)
+        counts = Notification.objects.filter(user=self.request.user).aggregate(
+            total=Count('id'),
+            unread=Count('id', filter=Q(is_read=False)),
+        )
+        context['unread_count'] = counts['unread']
+        context['total_count'] = counts['total']
         
         return context
 
@@ -122,18 +122,18 @@ def mark_all_notifications_read(request):
     Returns:
         JsonResponse with success status and count of marked notifications
     """
-    unread_notifications = Notification.objects.filter(
+    # update() возвращает количество обновленных строк - отдельный COUNT не нужен
+    count = Notification.objects.filter(
         user=request.user, 
         is_read=False
+    ).update(
+        is_read=True,
+        read_at=timezone.now()
     )
     
-    count = unread_notifications.count()
-    
     if count > 0:
-        unread_notifications.update(
-            is_read=True,
-            read_at=timezone.now()
-        )
+        # update() не отправляет сигналы - сбрасываем кэш счетчика сами
+        clear_user_cache(request.user.id)
         
         return JsonResponse({
             'success': True, 
@@ -45,7 +45,7 @@ class OrderListView(ListView):
     
     def get_queryset(self):
         """Get filtered orders for all users."""
-        queryset = Order.objects.select_related('factory', 'factory__country', 'employee')
+        queryset = Order.objects.for_list()
         
         # Исключаем отмененные клиентом заказы из общего списка
         # Используем ~Q для безопасной обработки возможных NULL значений
@@ -668,7 +668,7 @@ class CancelledByClientOrderListView(ListView):
         """Get orders cancelled by client."""
         queryset = Order.objects.filter(
             cancelled_by_client=True
-        ).select_related('factory', 'factory__country', 'employee', 'cancelled_by_client_by')
+        ).for_list().select_related('cancelled_by_client_by')
         
         # Apply filters
         factory_filter = self.request.GET.get('factory')
@@ -47,17 +47,21 @@ class ProfileView(TemplateView):
         
         # Статистика пользователя
         from ..models import Order, Notification
-        from django.db.models import Q
+        from django.db.models import Count, Q
         # Используем ~Q для безопасной обработки возможных NULL значений
         user_orders = Order.objects.filter(~Q(cancelled_by_client=True))
         user_notifications = Notification.objects.filter(user=user)
+        notification_counts = user_notifications.aggregate(
+            total=Count('id'),
+            unread=Count('id', filter=Q(is_read=False)),
+        )
         
         context.update({
             'profile': profile,
             'user_orders_count': user_orders.count(),
-            'user_notifications_count': user_notifications.count(),
-            'unread_notifications_count': user_notifications.filter(is_read=False).count(),
-            'recent_orders': user_orders.select_related('factory', 'factory__country', 'employee').order_by('-uploaded_at')[:5],
+            'user_notifications_count': notification_counts['total'],
+            'unread_notifications_count': notification_counts['unread'],
+            'recent_orders': user_orders.for_list().order_by('-uploaded_at')[:5],
             'recent_notifications': user_notifications.order_by('-created_at')[:5],
         })
         
@@ -199,15 +199,17 @@ class ShipmentCreateView(CreateView):
             form.save_m2m()  # Save ManyToMany relationships
             
             # Create audit log for each order
-            for order in shipment.orders.all():
-                OrderAuditLog.log_action(
-                    order=order,
-                    user=self.request.user,
-                    action='updated',
-                    field_name='shipment',
-                    new_value=f'Добавлен в фуру {shipment.shipment_number}',
-                    comments=f'Заказ добавлен в фуру {shipment.shipment_number}'
-                )
+            OrderAuditLog.log_actions([
+                {
+                    'order': order,
+                    'user': self.request.user,
+                    'action': 'updated',
+                    'field_name': 'shipment',
+                    'new_value': f'Добавлен в фуру {shipment.shipment_number}',
+                    'comments': f'Заказ добавлен в фуру {shipment.shipment_number}',
+                }
+                for order in shipment.orders.all()
+            ])
         
         messages.success(
             self.request,
@@ -248,25 +250,29 @@ class ShipmentUpdateView(UpdateView):
             removed_orders = old_orders - new_orders
             
             # Create audit logs
-            for order in added_orders:
-                OrderAuditLog.log_action(
-                    order=order,
-                    user=self.request.user,
-                    action='updated',
-                    field_name='shipment',
-                    new_value=f'Добавлен в фуру {shipment.shipment_number}',
-                    comments=f'Заказ добавлен в фуру {shipment.shipment_number}'
-                )
-            
-            for order in removed_orders:
-                OrderAuditLog.log_action(
-                    order=order,
-                    user=self.request.user,
-                    action='updated',
-                    field_name='shipment',
-                    old_value=f'Был в фуре {shipment.shipment_number}',
-                    comments=f'Заказ удален из фуры {shipment.shipment_number}'
-                )
+            audit_entries = [
+                {
+                    'order': order,
+                    'user': self.request.user,
+                    'action': 'updated',
+                    'field_name': 'shipment',
+                    'new_value': f'Добавлен в фуру {shipment.shipment_number}',
+                    'comments': f'Заказ добавлен в фуру {shipment.shipment_number}',
+                }
+                for order in added_orders
+            ]
+            audit_entries.extend(
+                {
+                    'order': order,
+                    'user': self.request.user,
+                    'action': 'updated',
+                    'field_name': 'shipment',
+                    'old_value': f'Был в фуре {shipment.shipment_number}',
+                    'comments': f'Заказ удален из фуры {shipment.shipment_number}',
+                }
+                for order in removed_orders
+            )
+            OrderAuditLog.log_actions(audit_entries)
         
         messages.success(
             self.request,
@@ -291,15 +297,17 @@ class ShipmentDeleteView(DeleteView):
         
         with transaction.atomic():
             # Create audit logs before deletion
-            for order in orders:
-                OrderAuditLog.log_action(
-                    order=order,
-                    user=request.user,
-                    action='updated',
-                    field_name='shipment',
-                    old_value=f'Был в фуре {shipment.shipment_number}',
-                    comments=f'Фура {shipment.shipment_number} удалена'
-                )
+            OrderAuditLog.log_actions([
+                {
+                    'order': order,
+                    'user': request.user,
+                    'action': 'updated',
+                    'field_name': 'shipment',
+                    'old_value': f'Был в фуре {shipment.shipment_number}',
+                    'comments': f'Фура {shipment.shipment_number} удалена',
+                }
+                for order in orders
+            ])
             
             return super().delete(request, *args, **kwargs)
     